@@ -1,25 +1,35 @@
 import asyncio
+import hashlib
 
 import secrets
 import threading
 import time
 import os
 import subprocess
+import signal
 import json
+import zlib
 import time
-from typing import List, Optional
+from typing import Dict, List, Optional, Set
 from pathlib import Path
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from starlette.websockets import WebSocketState
+from fastapi.responses import FileResponse, Response
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
 
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json is the fallback
+    orjson = None
+
 from .wrapper import manager, Container
-from .metrics import collector
+from .metrics import collector, parse_cpu_stat
 from .ml import detector
-from .storage import metrics_storage, process_inspector
+from .storage import MetricRow, metrics_storage, process_inspector
+from . import inotify
 
 # Pydantic models
 class ContainerCreate(BaseModel):
@@ -35,175 +45,1023 @@ class ContainerResponse(BaseModel):
     state: str
     pid: int
 
+def encode_message(message: dict) -> str:
+    """Serialize a WebSocket message to JSON text"""
+    if orjson is not None:
+        return orjson.dumps(message).decode()
+    return json.dumps(message)
+
+def diff_metrics_payload(prev: dict, cur: dict) -> dict:
+    """Build a metrics_delta message turning `prev` into `cur`
+    
+    Per-container metrics carry only the fields that changed; every other
+    top-level key is resent whole when its value differs. Anomalies are
+    per-tick events, so they are always sent as-is.
+    """
+    changed = {}
+    for key, value in cur.items():
+        if key in ("type", "metrics"):
+            continue
+        if key == "anomalies" or prev.get(key) != value:
+            changed[key] = value
+    
+    prev_metrics = prev.get("metrics", {})
+    cur_metrics = cur.get("metrics", {})
+    metrics = {}
+    for cid, m in cur_metrics.items():
+        old = prev_metrics.get(cid)
+        if old is None:
+            metrics[cid] = m
+        elif old != m:
+            metrics[cid] = {k: v for k, v in m.items() if old.get(k) != v}
+    
+    return {
+        "type": "metrics_delta",
+        "changed": changed,
+        "metrics": metrics,
+        "removed": [cid for cid in prev_metrics if cid not in cur_metrics],
+    }
+
+class _Frame:
+    """One broadcast tick: the full message plus an optional delta from the tick before
+    
+    Each representation (full/delta, JSON text/deflated bytes) is built on
+    first use and then shared by every client that needs it.
+    """
+    
+    __slots__ = ("seq", "message", "delta", "_encoded")
+    
+    def __init__(self, seq: int, message: dict, delta: Optional[dict]):
+        self.seq = seq
+        self.message = message
+        self.delta = delta
+        self._encoded = {}
+    
+    def text(self, delta: bool = False) -> str:
+        key = ("text", delta)
+        if key not in self._encoded:
+            self._encoded[key] = encode_message(self.delta if delta else self.message)
+        return self._encoded[key]
+    
+    def deflated(self, delta: bool = False) -> bytes:
+        key = ("deflate", delta)
+        if key not in self._encoded:
+            self._encoded[key] = deflate_message(self.text(delta))
+        return self._encoded[key]
+
+def deflate_message(text: str) -> bytes:
+    """Raw-deflate a JSON message for clients that asked for ?codec=deflate"""
+    compressor = zlib.compressobj(1, zlib.DEFLATED, -15)
+    return compressor.compress(text.encode()) + compressor.flush()
+
+# Message codecs a client may request with ?codec=...
+CODECS = ("json", "deflate")
+
+# Fixed reply to client heartbeats, encoded once
+PONG_MESSAGE = encode_message({"type": "pong"})
+
 # WebSocket connections
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    """Fan-out of broadcast messages to WebSocket clients
+    
+    Each connection gets a small bounded queue drained by its own pump task,
+    so broadcast() only enqueues and one slow client never delays the others.
+    When a client falls behind, its oldest queued message is dropped.
+    
+    Clients ping every few seconds; one that has been silent for
+    `heartbeat_timeout` seconds is treated as a zombie and closed.
+    
+    Clients that connect with ?codec=deflate get binary frames compressed
+    once per tick and shared. Per-connection permessage-deflate is turned
+    off (UVICORN_WS_OPTIONS), so plain JSON clients are sent uncompressed.
     
-    async def connect(self, websocket: WebSocket):
+    Consecutive metrics messages are delta-encoded. A client receives the
+    full message on connect, after any dropped frame, and on every
+    `keyframe_interval`-th tick; otherwise it gets only the delta.
+    """
+    
+    def __init__(self, queue_size: int = 4, keyframe_interval: int = 10,
+                 heartbeat_timeout: float = 30.0):
+        self.active_connections: Set[WebSocket] = set()
+        self.queue_size = queue_size
+        self.keyframe_interval = keyframe_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self._queues: Dict[WebSocket, asyncio.Queue] = {}
+        self._pumps: Dict[WebSocket, asyncio.Task] = {}
+        self._last_seen: Dict[WebSocket, float] = {}
+        self._last_frame: Optional[_Frame] = None
+        self._close_tasks: Set[asyncio.Task] = set()  # strong refs until each close finishes
+    
+    async def connect(self, websocket: WebSocket, codec: str = "json"):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.active_connections.add(websocket)
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        if self._last_frame is not None:
+            # Give the new client the latest snapshot right away
+            queue.put_nowait(self._last_frame)
+        self._queues[websocket] = queue
+        self._last_seen[websocket] = time.monotonic()
+        self._pumps[websocket] = asyncio.create_task(self._pump(websocket, queue, codec))
     
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        self.active_connections.discard(websocket)
+        self._queues.pop(websocket, None)
+        self._last_seen.pop(websocket, None)
+        pump = self._pumps.pop(websocket, None)
+        if pump is not None and pump is not asyncio.current_task():
+            pump.cancel()
+    
+    def touch(self, websocket: WebSocket):
+        """Record that a client is still alive"""
+        if websocket in self._last_seen:
+            self._last_seen[websocket] = time.monotonic()
+    
+    def send(self, websocket: WebSocket, text: str):
+        """Queue a text message for one client"""
+        queue = self._queues.get(websocket)
+        if queue is not None and not queue.full():
+            queue.put_nowait(text)
+    
+    def _reap_stale(self):
+        """Close clients that missed their heartbeats"""
+        cutoff = time.monotonic() - self.heartbeat_timeout
+        for websocket, seen in list(self._last_seen.items()):
+            if seen < cutoff:
+                self.disconnect(websocket)
+                task = asyncio.create_task(self._close(websocket))
+                self._close_tasks.add(task)
+                task.add_done_callback(self._close_tasks.discard)
+    
+    async def _close(self, websocket: WebSocket):
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+    
+    async def _pump(self, websocket: WebSocket, queue: asyncio.Queue, codec: str):
+        """Send queued frames to one client until it goes away"""
+        last_seq = None
+        try:
+            while True:
+                frame = await queue.get()
+                # Coalesce a backlog: only the newest frame is worth sending,
+                # and it goes out in full since the ones before it are skipped
+                while not queue.empty() and not isinstance(frame, str):
+                    newer = queue.get_nowait()
+                    if isinstance(newer, str):
+                        await websocket.send_text(newer)
+                    else:
+                        frame = newer
+                if isinstance(frame, str):
+                    await websocket.send_text(frame)
+                    continue
+                delta = frame.delta is not None and last_seq == frame.seq - 1
+                if codec == "deflate":
+                    await websocket.send_bytes(frame.deflated(delta))
+                else:
+                    await websocket.send_text(frame.text(delta))
+                last_seq = frame.seq
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.disconnect(websocket)
     
     async def broadcast(self, message: dict):
-        for connection in self.active_connections[:]:
-            try:
-                await connection.send_json(message)
-            except:
-                self.disconnect(connection)
+        self._reap_stale()
+        prev = self._last_frame
+        seq = prev.seq + 1 if prev is not None else 0
+        delta = None
+        if (prev is not None and message.get("type") == "metrics"
+                and prev.message.get("type") == "metrics"
+                and seq % self.keyframe_interval):
+            delta = diff_metrics_payload(prev.message, message)
+        
+        # Frames encode lazily and at most once, however many clients they reach
+        frame = _Frame(seq, message, delta)
+        self._last_frame = frame
+        for websocket, queue in tuple(self._queues.items()):
+            if (websocket.client_state != WebSocketState.CONNECTED
+                    or websocket.application_state != WebSocketState.CONNECTED):
+                # Mid-disconnect: drop it here instead of failing a send later
+                self.disconnect(websocket)
+                continue
+            if queue.full():
+                # Drop the stalest message rather than block on a slow client
+                queue.get_nowait()
+            queue.put_nowait(frame)
 
 ws_manager = ConnectionManager()
 
 # Runtime path
 RUNTIME_PATH = Path("/home/student/container/runtime/build/kernelsight-runtime")
 CGROUP_BASE = Path("/sys/fs/cgroup/kernelsight")
+STATE_DIR = Path("/var/lib/kernelsight/containers")
 DASHBOARD_DIST = Path("/home/student/container/dashboard/dist")
 
-def run_runtime_command(args: List[str]) -> tuple:
-    """Run the C runtime CLI and return output"""
-    env = os.environ.copy()
-    env["LD_LIBRARY_PATH"] = str(RUNTIME_PATH.parent)
+# Already privileged (e.g. run as a root service): skip the sudo fork+exec+PAM hop
+SUDO = [] if os.geteuid() == 0 else ["sudo"]
+
+# Runtime binary and environment, built once instead of per call
+RUNTIME_BIN = str(RUNTIME_PATH)
+RUNTIME_ENV = {**os.environ, "LD_LIBRARY_PATH": str(RUNTIME_PATH.parent)}
+
+async def run_privileged(argv: List[str], input: bytes = None, env: dict = None,
+                         timeout: float = 30) -> tuple:
+    """Run a command (through sudo unless already root) without blocking the event loop"""
+    proc = await asyncio.create_subprocess_exec(
+        *SUDO, *argv,
+        stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(input), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+    return proc.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+
+async def write_privileged(path: str, data: str):
+    """Write a root-owned file, e.g. a cgroup limit or state.txt"""
+    await run_privileged(["tee", path], input=data.encode())
+
+# Runs under one sudo: argv is a directory count, the directories, then
+# (path, mode, data) triples; an empty mode leaves the file mode alone
+_WRITE_FILES_SCRIPT = r"""
+n=$1; shift
+while [ "$n" -gt 0 ]; do mkdir -p -- "$1"; shift; n=$((n-1)); done
+while [ $# -ge 3 ]; do
+    printf '%s' "$3" > "$1"
+    [ -z "$2" ] || chmod "$2" "$1"
+    shift 3
+done
+"""
+
+async def write_files_privileged(dirs: List[str], files: List[tuple]):
+    """Create root-owned directories, then write (path, data, mode) files in order
     
+    Directly when already privileged, otherwise in a single sudo shell
+    instead of one mkdir/tee/chmod process per step. Failures of single
+    steps are ignored, as with write_privileged().
+    """
+    if not SUDO:
+        for path in dirs:
+            try:
+                os.makedirs(path, exist_ok=True)
+            except OSError:
+                pass
+        for path, data, mode in files:
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+                try:
+                    os.write(fd, data.encode())
+                finally:
+                    os.close(fd)
+                if mode:
+                    os.chmod(path, int(mode, 8))
+            except OSError:
+                pass
+        return
+    
+    argv = [str(len(dirs)), *dirs]
+    for path, data, mode in files:
+        argv += [path, mode or "", data]
+    await run_privileged(["/bin/sh", "-c", _WRITE_FILES_SCRIPT, "sh", *argv])
+
+async def kill_pids(pids: List[int]):
+    """SIGKILL processes, directly when privileged and with one sudo kill otherwise"""
+    if not pids:
+        return
+    if not SUDO:
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+        return
+    await run_privileged(["kill", "-9", *map(str, pids)])
+
+async def kill_cgroup(container_id: str) -> bool:
+    """Kill every process in a container's cgroup via cgroup.kill (Linux 5.14+)
+    
+    Returns False when cgroup.kill is unavailable so the caller can fall
+    back to signalling pids one by one.
+    """
+    kill_file = f"{CGROUP_BASE}/{container_id}/cgroup.kill"
+    if not os.path.exists(kill_file):
+        return False
     try:
-        result = subprocess.run(
-            ["sudo", str(RUNTIME_PATH)] + args,
-            capture_output=True, text=True, timeout=30, env=env
-        )
-        return result.returncode, result.stdout, result.stderr
+        if SUDO:
+            code, _, _ = await run_privileged(["tee", kill_file], input=b"1")
+            return code == 0
+        fd = os.open(kill_file, os.O_WRONLY)
+        try:
+            os.write(fd, b"1")
+        finally:
+            os.close(fd)
+        return True
+    except OSError:
+        return False
+
+async def run_runtime_command(args: List[str]) -> tuple:
+    """Run the C runtime CLI and return output"""
+    try:
+        return await run_privileged([RUNTIME_BIN, *args], env=RUNTIME_ENV)
     except Exception as e:
         return -1, "", str(e)
 
+class CgroupFileCache:
+    """Long-lived read-only fds on cgroup pseudo-files
+    
+    cgroup files regenerate their content when read from offset 0, so each
+    (container, file) pair is opened once and every tick is a single pread
+    instead of open+read+close. memory.max is cached too: create/start
+    record the value they wrote via set_mem_limit(), and the broadcast loop
+    calls expire_mem_limits() every MEM_LIMIT_RECHECK_TICKS ticks so a
+    `kernelsight update` from the CLI is picked up.
+    
+    While the ContainerWatcher has cgroup.events watches in place
+    (`event_driven`), the init pid is also cached until that container's
+    populated state flips or the next full container rescan (init can exit
+    while other processes keep the cgroup populated), and a cgroup known to be empty is not re-read:
+    its last sample is reused until an event invalidates it. Running
+    cgroups are still read every tick since memory.current, pids.current
+    and cpu.stat change without notification.
+    
+    Reads run on executor and threadpool threads while close() runs on the
+    event loop, so an fd closed while any read is in flight is only closed
+    once the last read finishes; its number cannot be reused under a
+    pread in progress.
+    """
+    
+    FILES = {
+        "mem": "memory.current",
+        "memmax": "memory.max",
+        "pids": "pids.current",
+        "cpustat": "cpu.stat",
+        "procs": "cgroup.procs",
+    }
+    
+    def __init__(self):
+        self._fds: Dict[str, Dict[str, int]] = {}
+        self._mem_limits: Dict[str, Optional[int]] = {}
+        self._init_pids: Dict[str, Optional[int]] = {}
+        self._idle_samples: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._readers = 0
+        self._deferred_closes: List[int] = []
+        self.event_driven = False
+    
+    def _open(self, cid: str, key: str) -> int:
+        with self._lock:
+            fd = self._fds.get(cid, {}).get(key)
+            if fd is None:
+                fd = os.open(f"{CGROUP_BASE}/{cid}/{self.FILES[key]}",
+                             os.O_RDONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+                # Only after a successful open, so unknown ids leave no entry
+                self._fds.setdefault(cid, {})[key] = fd
+            return fd
+    
+    def _close_fd(self, fd: int):
+        """Close an fd, or defer it while a read is in flight (caller holds _lock)"""
+        if self._readers:
+            self._deferred_closes.append(fd)
+            return
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+    
+    def _drop(self, cid: str, key: str, fd: int):
+        with self._lock:
+            fds = self._fds.get(cid, {})
+            if fds.get(key) == fd:
+                del fds[key]
+                self._close_fd(fd)
+    
+    def _end_read(self):
+        with self._lock:
+            self._readers -= 1
+            if not self._readers and self._deferred_closes:
+                deferred, self._deferred_closes = self._deferred_closes, []
+                for fd in deferred:
+                    self._close_fd(fd)
+    
+    def read(self, cid: str, key: str, size: int = 256) -> bytes:
+        """pread the file from offset 0, reopening once if the cgroup was recreated"""
+        with self._lock:
+            self._readers += 1
+        try:
+            fd = self._fds.get(cid, {}).get(key)
+            if fd is None:
+                fd = self._open(cid, key)
+            try:
+                return os.pread(fd, size, 0)
+            except OSError:
+                self._drop(cid, key, fd)
+            return os.pread(self._open(cid, key), size, 0)
+        finally:
+            self._end_read()
+    
+    def read_int(self, cid: str, key: str) -> int:
+        return int(self.read(cid, key))
+    
+    def init_pid(self, cid: str) -> Optional[int]:
+        """Lowest pid in the cgroup (the container's init), None when empty"""
+        if self.event_driven and cid in self._init_pids:
+            return self._init_pids[cid]
+        try:
+            pids = self.read(cid, "procs", 65536).split()
+        except OSError:
+            # No such cgroup (yet): nothing worth caching
+            return None
+        pid = min(map(int, pids)) if pids else None
+        if self.event_driven:
+            self._init_pids[cid] = pid
+        return pid
+    
+    def mem_limit(self, cid: str) -> Optional[int]:
+        """memory.max in bytes, or None when unlimited (cached per container)"""
+        if cid not in self._mem_limits:
+            data = self.read(cid, "memmax")
+            self._mem_limits[cid] = None if data == b"max\n" else int(data)
+        return self._mem_limits[cid]
+    
+    def set_mem_limit(self, cid: str, limit: Optional[int]):
+        """Record a memory.max value this process just wrote, so it is not read back"""
+        self._mem_limits[cid] = limit
+    
+    def expire_mem_limits(self):
+        """Re-read memory.max on next use; other tools may have changed it"""
+        self._mem_limits.clear()
+    
+    def sample(self, cid: str) -> tuple:
+        """Read (memory, memory limit, pids, cpu usec, nr_throttled) for one container
+        
+        Files that cannot be read report 0 (None for the memory limit).
+        """
+        idle = self.event_driven and cid in self._init_pids and self._init_pids[cid] is None
+        if idle and cid in self._idle_samples:
+            return self._idle_samples[cid]
+        
+        mem = pids = cpu_usec = throttle_count = 0
+        mem_limit = None
+        try:
+            mem = self.read_int(cid, "mem")
+        except:
+            pass
+        try:
+            mem_limit = self.mem_limit(cid)
+        except:
+            pass
+        try:
+            pids = self.read_int(cid, "pids")
+        except:
+            pass
+        try:
+            cpu_usec, throttle_count = parse_cpu_stat(self.read(cid, "cpustat"))
+        except:
+            pass
+        result = (mem, mem_limit, pids, cpu_usec, throttle_count)
+        if idle:
+            self._idle_samples[cid] = result
+        return result
+    
+    def read_all(self, cids) -> Dict[str, tuple]:
+        """Sample every container in one pass, ahead of any per-tick processing
+        
+        Keeping the reads together gives all containers the same sampling
+        instant and is the single place a batched read backend would plug in.
+        """
+        return {cid: self.sample(cid) for cid in cids}
+    
+    def close(self, cid: str):
+        """Close every fd held for a container"""
+        with self._lock:
+            for fd in self._fds.pop(cid, {}).values():
+                self._close_fd(fd)
+        self._mem_limits.pop(cid, None)
+        self.invalidate(cid)
+    
+    def invalidate(self, cid: str):
+        """Forget the cached init pid and idle sample after a cgroup event"""
+        self._init_pids.pop(cid, None)
+        self._idle_samples.pop(cid, None)
+    
+    def invalidate_all(self):
+        self._init_pids.clear()
+        self._idle_samples.clear()
+    
+    def prune(self, live_ids):
+        """Close fds of containers that no longer exist"""
+        # Snapshot under the lock: threadpool handlers may open fds meanwhile
+        with self._lock:
+            stale = [cid for cid in self._fds if cid not in live_ids]
+        for cid in stale:
+            self.close(cid)
+
+cgroup_files = CgroupFileCache()
+
+# Parsed state.txt files keyed by path -> ((mtime_ns, size), data)
+_state_cache: Dict[str, tuple] = {}
+
+def read_state_file(path: str) -> dict:
+    """Parse a key=value state file, reusing the last parse while it is unchanged"""
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _state_cache.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    
+    with open(path, "rb") as f:
+        raw = f.read()
+    data = {}
+    for line in raw.splitlines():
+        key, sep, val = line.partition(b"=")
+        if sep:
+            data[key.decode()] = val.decode()
+    _state_cache[path] = (stamp, data)
+    return data
+
+class ContainerListCache:
+    """Short-lived snapshot of the container list
+    
+    The broadcast loop and the HTTP handlers all need the same list, so one
+    directory walk is shared for `ttl` seconds. The snapshot is also dropped
+    when the state directory mtime changes or when invalidate() is called
+    after a create/start/stop/delete.
+    
+    While an inotify watcher is feeding invalidate(), `event_ttl` is used
+    instead: the snapshot lives until an event arrives, with the long TTL
+    only as a safety net for changes inotify cannot see. Events that name
+    a container only re-read that container through `refresh`; the full
+    walk is left for additions/removals and the safety net.
+    """
+    
+    def __init__(self, ttl: float = 0.5, event_ttl: float = 5.0):
+        self.ttl = ttl
+        self.event_ttl = event_ttl
+        self.event_driven = False
+        self.generation = 0
+        self._snapshot: Optional[Dict[str, dict]] = None
+        self._snapshot_generation = -1
+        self._snapshot_time = 0.0
+        self._snapshot_mtime = None
+        self._dirty = set()
+        self._full = True
+    
+    def invalidate(self, cid: Optional[str] = None):
+        """Force the next get() to rescan, or to re-read only `cid` when given"""
+        if cid is None:
+            self._full = True
+        else:
+            self._dirty.add(cid)
+        self.generation += 1
+    
+    def get(self, loader, refresh=None) -> list:
+        now = time.monotonic()
+        try:
+            mtime = STATE_DIR.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        
+        ttl = self.event_ttl if self.event_driven else self.ttl
+        fresh = (self._snapshot is not None
+                 and self._snapshot_mtime == mtime
+                 and now - self._snapshot_time < ttl)
+        if fresh and self._snapshot_generation == self.generation:
+            return list(self._snapshot.values())
+        
+        if fresh and not self._full and refresh is not None:
+            # Only named containers changed: re-read just those
+            dirty, self._dirty = self._dirty, set()
+            self._snapshot_generation = self.generation
+            for cid in dirty:
+                entry = refresh(cid)
+                if entry is None:
+                    self._snapshot.pop(cid, None)
+                else:
+                    self._snapshot[entry["id"]] = entry
+            return list(self._snapshot.values())
+        
+        generation = self.generation
+        self._dirty = set()
+        self._full = False
+        self._snapshot = {c["id"]: c for c in loader()}
+        self._snapshot_generation = generation
+        self._snapshot_time = now
+        self._snapshot_mtime = mtime
+        return list(self._snapshot.values())
+
+container_cache = ContainerListCache()
+
+class ContainerWatcher:
+    """inotify watches that invalidate the container list on change
+    
+    Watches the state directory (containers added/removed), each container's
+    state dir (state.txt rewritten), the cgroup root (cgroups added/removed)
+    and each container's cgroup.events (populated flips when the last
+    process exits or the first one starts). Any event bumps the cache
+    generation; cgroup events also invalidate that container's cached init
+    pid, and a removed cgroup releases its cached fds.
+    """
+    
+    STATE_ROOT_MASK = (inotify.IN_CREATE | inotify.IN_DELETE | inotify.IN_MOVED_FROM
+                       | inotify.IN_MOVED_TO | inotify.IN_ONLYDIR)
+    STATE_DIR_MASK = inotify.IN_CLOSE_WRITE | inotify.IN_MOVED_TO | inotify.IN_DELETE
+    CGROUP_ROOT_MASK = inotify.IN_CREATE | inotify.IN_DELETE | inotify.IN_ONLYDIR
+    CGROUP_EVENTS_MASK = inotify.IN_MODIFY
+    
+    def __init__(self):
+        self._inotify = None
+        self._watches: Dict[int, tuple] = {}  # wd -> (kind, container id)
+    
+    def start(self) -> bool:
+        """Begin watching; returns False (polling stays on) if inotify is unavailable"""
+        try:
+            self._inotify = inotify.Inotify()
+            self._watch(str(STATE_DIR), self.STATE_ROOT_MASK, "state_root", None)
+        except (OSError, AttributeError):
+            self.stop()
+            return False
+        
+        self._watch_children(str(STATE_DIR), self._watch_state_dir)
+        try:
+            self._watch(str(CGROUP_BASE), self.CGROUP_ROOT_MASK, "cgroup_root", None)
+            self._watch_children(str(CGROUP_BASE), self._watch_cgroup)
+        except OSError:
+            pass  # no cgroups yet; state.txt events still cover create/start/stop
+        
+        asyncio.get_running_loop().add_reader(self._inotify.fd, self._on_readable)
+        container_cache.event_driven = True
+        container_cache.invalidate()
+        cgroup_files.event_driven = True
+        cgroup_files.invalidate_all()
+        return True
+    
+    def stop(self):
+        container_cache.event_driven = False
+        cgroup_files.event_driven = False
+        cgroup_files.invalidate_all()
+        if self._inotify is not None:
+            try:
+                asyncio.get_running_loop().remove_reader(self._inotify.fd)
+            except (RuntimeError, ValueError):
+                pass
+            self._inotify.close()
+            self._inotify = None
+        self._watches.clear()
+    
+    def _watch(self, path: str, mask: int, kind: str, cid: Optional[str]):
+        wd = self._inotify.add_watch(path, mask)
+        self._watches[wd] = (kind, cid)
+    
+    def _watch_children(self, root: str, add):
+        try:
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        add(entry.name)
+        except OSError:
+            pass
+    
+    def _watch_state_dir(self, cid: str):
+        try:
+            self._watch(f"{STATE_DIR}/{cid}", self.STATE_DIR_MASK, "state", cid)
+        except OSError:
+            pass
+    
+    def _watch_cgroup(self, cid: str):
+        try:
+            self._watch(f"{CGROUP_BASE}/{cid}/cgroup.events", self.CGROUP_EVENTS_MASK, "cgroup", cid)
+        except OSError:
+            pass
+    
+    def _on_readable(self):
+        try:
+            events = self._inotify.read_events()
+        except OSError:
+            return
+        for wd, mask, name in events:
+            kind, cid = self._watches.get(wd, (None, None))
+            if mask & inotify.IN_IGNORED:
+                # Watch removed (its target was deleted)
+                self._watches.pop(wd, None)
+                continue
+            if kind == "state_root" and mask & (inotify.IN_CREATE | inotify.IN_MOVED_TO):
+                self._watch_state_dir(name)
+            elif kind == "cgroup_root" and mask & inotify.IN_CREATE:
+                # Watch first, then drop anything cached before the watch existed
+                self._watch_cgroup(name)
+                cgroup_files.invalidate(name)
+            elif kind == "cgroup_root" and mask & inotify.IN_DELETE:
+                cgroup_files.close(name)
+            elif kind == "cgroup":
+                cgroup_files.invalidate(cid)
+            
+            # Re-read only the container the event is about
+            if kind in ("state_root", "cgroup_root"):
+                container_cache.invalidate(name)
+            elif kind in ("state", "cgroup"):
+                container_cache.invalidate(cid)
+            else:
+                container_cache.invalidate()
+
+container_watcher = ContainerWatcher()
+
 def get_running_containers():
+    """Get list of containers, served from the short-lived cache"""
+    return container_cache.get(scan_containers, load_container)
+
+def container_from_state(dir_name: str, data: dict) -> dict:
+    """Build a container entry from its parsed state file, checking the cgroup for the real state"""
+    cid = data.get("id", dir_name)
+    pid = int(data.get("pid", 0))
+    
+    # Determine actual state by checking cgroup: pids.current is a single
+    # int on an fd the metrics tick already holds; cgroup.procs only when
+    # the pids controller is not enabled
+    actual_state = "created"
+    try:
+        procs = cgroup_files.read_int(cid, "pids")
+    except (OSError, ValueError):
+        try:
+            procs = len(cgroup_files.read(cid, "procs", 16).strip())
+        except OSError:
+            procs = None
+    
+    if procs is not None:
+        if procs > 0:
+            # Has active processes in cgroup
+            actual_state = "running"
+        else:
+            # Cgroup exists but no processes
+            actual_state = "stopped"
+    elif pid > 0:
+        # Check if PID is still running (one stat, no signal/exception path)
+        actual_state = "running" if os.path.exists(f"/proc/{pid}") else "stopped"
+    
+    return {
+        "id": cid,
+        "name": data.get("name", dir_name),
+        "state": actual_state,
+        "pid": pid
+    }
+
+def load_container(dir_name: str) -> Optional[dict]:
+    """Read one container's entry from its state dir, None if it is gone or unreadable"""
+    state_file = f"{STATE_DIR}/{dir_name}/state.txt"
+    try:
+        return container_from_state(dir_name, read_state_file(state_file))
+    except OSError:
+        _state_cache.pop(state_file, None)
+    except:
+        pass
+    return None
+
+def get_container_by_id(container_id: str, match_name: bool = False) -> Optional[dict]:
+    """Look up one container by id or id prefix without scanning every state file
+    
+    An exact id reads only that container's state file; a prefix costs one
+    directory listing. With `match_name`, a container whose name equals
+    `container_id` is accepted as a last resort (that needs the full list).
+    """
+    dir_name = container_id
+    if not os.path.isfile(f"{STATE_DIR}/{container_id}/state.txt"):
+        dir_name = None
+        try:
+            with os.scandir(STATE_DIR) as entries:
+                for entry in entries:
+                    if entry.name.startswith(container_id) and entry.is_dir(follow_symlinks=False):
+                        dir_name = entry.name
+                        break
+        except OSError:
+            pass
+    
+    if dir_name is not None:
+        container = load_container(dir_name)
+        if container is not None:
+            return container
+    
+    if match_name:
+        for c in get_running_containers():
+            if c["name"] == container_id:
+                return c
+    return None
+
+def scan_containers():
     """Get list of containers from state files with accurate state detection"""
+    # A full rescan is also the safety net for cached init pids: init may
+    # have exited while an exec'd process keeps the cgroup populated
+    cgroup_files.invalidate_all()
+    
     containers = []
-    state_dir = Path("/var/lib/kernelsight/containers")
-    
-    if state_dir.exists():
-        for container_dir in state_dir.iterdir():
-            if container_dir.is_dir():
-                state_file = container_dir / "state.txt"
-                if state_file.exists():
-                    data = {}
-                    try:
-                        for line in state_file.read_text().splitlines():
-                            if "=" in line:
-                                key, val = line.split("=", 1)
-                                data[key] = val
-                        
-                        cid = data.get("id", container_dir.name)
-                        stored_state = data.get("state", "unknown")
-                        pid = int(data.get("pid", 0))
-                        
-                        # Determine actual state by checking cgroup
-                        actual_state = "created"
-                        cgroup_path = CGROUP_BASE / cid
-                        cgroup_procs = cgroup_path / "cgroup.procs"
-                        
-                        if cgroup_procs.exists():
-                            procs = cgroup_procs.read_text().strip()
-                            if procs:
-                                # Has active processes in cgroup
-                                actual_state = "running"
-                            else:
-                                # Cgroup exists but no processes
-                                actual_state = "stopped"
-                        elif pid > 0:
-                            # Check if PID is still running
-                            try:
-                                os.kill(pid, 0)
-                                actual_state = "running"
-                            except (ProcessLookupError, PermissionError):
-                                actual_state = "stopped"
-                        
-                        containers.append({
-                            "id": cid,
-                            "name": data.get("name", container_dir.name),
-                            "state": actual_state,
-                            "pid": pid
-                        })
-                    except:
-                        pass
+    seen_files = set()
+    
+    try:
+        entries = os.scandir(STATE_DIR)
+    except OSError:
+        entries = None
+    
+    if entries is not None:
+        with entries:
+            for entry in entries:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+                state_file = f"{entry.path}/state.txt"
+                try:
+                    data = read_state_file(state_file)
+                except OSError:
+                    continue
+                seen_files.add(state_file)
+                try:
+                    containers.append(container_from_state(entry.name, data))
+                except:
+                    pass
+    
+    # Forget parsed state of containers that were deleted
+    for path in [p for p in _state_cache if p not in seen_files]:
+        del _state_cache[path]
     
     return containers
 
+class TickClock:
+    """Fixed-rate tick source for the broadcast loop
+    
+    Ticks land on interval boundaries no matter how long each tick's work
+    takes, so the period does not drift to (work + interval). Uses a timerfd
+    on the event loop where the platform exposes one (Python 3.13+ on Linux)
+    and sleeps to absolute deadlines otherwise.
+    """
+    
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self._deadline = None
+        self._fd = None
+        if hasattr(os, "timerfd_create"):
+            try:
+                self._fd = os.timerfd_create(time.CLOCK_MONOTONIC,
+                                             flags=os.TFD_NONBLOCK | os.TFD_CLOEXEC)
+                os.timerfd_settime(self._fd, initial=interval, interval=interval)
+            except OSError:
+                self._fd = None
+    
+    async def wait(self):
+        """Wait for the next tick boundary; missed ticks are coalesced"""
+        loop = asyncio.get_running_loop()
+        if self._fd is not None:
+            ready = loop.create_future()
+            loop.add_reader(self._fd, lambda: ready.done() or ready.set_result(None))
+            try:
+                await ready
+            finally:
+                loop.remove_reader(self._fd)
+            os.read(self._fd, 8)
+            return
+        
+        now = loop.time()
+        if self._deadline is None or self._deadline + self.interval < now:
+            self._deadline = now
+        self._deadline += self.interval
+        await asyncio.sleep(self._deadline - now)
+    
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
 # Metrics broadcast task - REAL METRICS ONLY
 async def metrics_broadcast_task():
     """Periodically broadcast real metrics to WebSocket clients"""
-    prev_cpu = {}
-    prev_time = {}
-    prev_throttle = {}
+    clock = TickClock(1.0)
+    try:
+        await _broadcast_loop(clock)
+    finally:
+        clock.close()
+
+class CpuDeltaTracker:
+    """Turns cumulative cpu.stat counters into per-tick CPU% and throttle flags
+    
+    Keeps one (usage_usec, time, nr_throttled) tuple per container so a tick
+    is a single dict lookup and store per container, computed for the whole
+    batch before any per-container processing.
+    """
+    
+    def __init__(self):
+        self._prev: Dict[str, tuple] = {}
+    
+    def update(self, samples: Dict[str, tuple], now: float) -> Dict[str, tuple]:
+        """Map each container id to (cpu_percent, is_throttled)"""
+        prev = self._prev
+        out = {}
+        for cid, (_, _, _, cpu_usec, throttle_count) in samples.items():
+            prev_usec, prev_t, prev_throttle = prev.get(cid, (0, now, 0))
+            cpu_percent = 0
+            if prev_usec > 0 and now > prev_t:
+                cpu_percent = (cpu_usec - prev_usec) / ((now - prev_t) * 1e6) * 100
+            out[cid] = (cpu_percent, throttle_count > prev_throttle)
+            prev[cid] = (cpu_usec, now, throttle_count)
+        # Forget containers that are gone
+        if len(prev) > len(samples):
+            for cid in [cid for cid in prev if cid not in samples]:
+                del prev[cid]
+        return out
+
+class CsvWriter:
+    """Background sink for the broadcast loop's CSV rows
+    
+    The loop only enqueues each tick's rows; a separate task drains every
+    pending batch and writes them in one executor call, so disk stalls
+    never delay a broadcast. If the disk falls far behind, the oldest
+    batches are dropped.
+    """
+    
+    def __init__(self, max_pending: int = 60):
+        self._queue: Optional[asyncio.Queue] = None
+        self._max_pending = max_pending
+    
+    def submit(self, metric_rows: List[MetricRow], anomaly_rows: List[tuple]):
+        if self._queue is None or not (metric_rows or anomaly_rows):
+            return
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait((metric_rows, anomaly_rows))
+    
+    async def run(self):
+        self._queue = asyncio.Queue(maxsize=self._max_pending)
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                batches = [await self._queue.get()]
+                while not self._queue.empty():
+                    batches.append(self._queue.get_nowait())
+                metric_rows = [r for rows, _ in batches for r in rows]
+                anomaly_rows = [a for _, rows in batches for a in rows]
+                await loop.run_in_executor(None, self._write, metric_rows, anomaly_rows)
+        finally:
+            self._queue = None
+    
+    @staticmethod
+    def _write(metric_rows: List[MetricRow], anomaly_rows: List[tuple]):
+        metrics_storage.store_anomalies(anomaly_rows)
+        metrics_storage.store_metrics_batch(metric_rows)
+
+csv_writer = CsvWriter()
+
+# With no containers, resend the (empty) payload only this often, in ticks
+IDLE_HEARTBEAT_TICKS = 10
+
+# Above this many containers the tick's cgroup reads leave the event loop;
+# below it the executor hop costs more than the reads themselves
+OFFLOAD_READS_AT = 8
+
+# Cached memory.max values are dropped this often, in ticks
+MEM_LIMIT_RECHECK_TICKS = 10
+
+async def _broadcast_loop(clock: TickClock):
+    cpu_tracker = CpuDeltaTracker()
+    idle_ticks = 0
+    tick = 0
     
     while True:
         if ws_manager.active_connections:
+            tick += 1
+            if tick % MEM_LIMIT_RECHECK_TICKS == 0:
+                cgroup_files.expire_mem_limits()
             containers = get_running_containers()
+            
+            # Nothing to measure: skip the payload build, only heartbeat now and then
+            if not containers:
+                idle_ticks += 1
+                if idle_ticks % IDLE_HEARTBEAT_TICKS != 1:
+                    await clock.wait()
+                    continue
+            else:
+                idle_ticks = 0
+            
             metrics_by_id = {}
+            detector_entries = []  # (cid, cpu%, mem, mem limit, throttled) for the ML pass
+            
+            # Get real metrics from cgroup only, all containers in one pass;
+            # with many containers the preads run in a worker thread so the
+            # loop keeps serving sockets meanwhile
+            cids = [c["id"] for c in containers]
+            if len(cids) > OFFLOAD_READS_AT:
+                samples = await asyncio.get_running_loop().run_in_executor(None, cgroup_files.read_all, cids)
+            else:
+                samples = cgroup_files.read_all(cids)
+            
+            # CPU% and throttling from counter deltas, whole batch at once
+            cpu_stats = cpu_tracker.update(samples, time.time())
+            
             for c in containers:
                 cid = c["id"]
-                current_time = time.time()
-                
-                # Get real metrics from cgroup only
-                cgroup = CGROUP_BASE / cid
-                mem = 0
-                cpu_usec = 0
-                pids = 0
-                mem_limit = 268435456
-                throttle_count = 0
-                
-                # Check for cached CPU values
-                if cid not in prev_cpu:
-                    prev_cpu[cid] = 0
-                if cid not in prev_time:
-                    prev_time[cid] = current_time
-                if cid not in prev_throttle:
-                    prev_throttle[cid] = 0
-
-                if cgroup.exists():
-                    try:
-                        mem = int((cgroup / "memory.current").read_text().strip())
-                    except:
-                        pass
-                    try:
-                        val = (cgroup / "memory.max").read_text().strip()
-                        if val != "max":
-                            mem_limit = int(val)
-                    except:
-                        pass
-                    try:
-                        pids = int((cgroup / "pids.current").read_text().strip())
-                    except:
-                        pass
-                    try:
-                        for line in (cgroup / "cpu.stat").read_text().splitlines():
-                            if line.startswith("usage_usec"):
-                                cpu_usec = int(line.split()[1])
-                            elif line.startswith("nr_throttled "):
-                                throttle_count = int(line.split()[1])
-                    except:
-                        pass
-                
-                # Detect if container is being throttled
-                is_throttled = False
-                if cid in prev_throttle:
-                    throttle_delta = throttle_count - prev_throttle[cid]
-                    is_throttled = throttle_delta > 0
-                prev_throttle[cid] = throttle_count
-                
-                # Calculate CPU percentage from delta
-                cpu_percent = 0
-                if cid in prev_cpu and prev_cpu[cid] > 0:
-                    cpu_delta = cpu_usec - prev_cpu[cid]
-                    time_delta = current_time - prev_time.get(cid, current_time)
-                    if time_delta > 0:
-                        cpu_percent = (cpu_delta / (time_delta * 1e6)) * 100
-                
-                prev_cpu[cid] = cpu_usec
-                prev_time[cid] = current_time
+                mem, mem_limit, pids, cpu_usec, throttle_count = samples[cid]
+                mem_limit = mem_limit or 268435456
+                cpu_percent, is_throttled = cpu_stats[cid]
                 
                 # Get init PID (main process of container)
-                init_pid = process_inspector.get_init_pid(cid)
+                init_pid = cgroup_files.init_pid(cid)
                 
                 # Real metrics only - no simulation
                 metrics_by_id[cid] = {
@@ -216,41 +1074,46 @@ async def metrics_broadcast_task():
                     "init_pid": init_pid,
                     "is_throttled": is_throttled
                 }
-                
-                # Feed metrics to ML anomaly detector (only for running containers)
-                anomalies = detector.add_metrics(cid, cpu_percent, mem, mem_limit, is_throttled)
-                
-                # Store anomalies to CSV
-                for anomaly in anomalies:
-                    metrics_storage.store_anomaly(cid, anomaly)
-                
-                # Get analytics for this container
-                analytics = detector.get_container_analytics(cid)
-                
-                # Store to CSV for history with enhanced data
-                container_name = next((c["name"] for c in containers if c["id"] == cid), cid)
-                metrics_storage.store_metrics(
-                    cid, container_name, cpu_percent, mem,
-                    (mem / mem_limit * 100) if mem_limit > 0 else 0,
-                    mem_limit, pids, 
-                    health_score=analytics.get("health_score", 100),
-                    stability_score=analytics.get("stability_score", 100),
-                    efficiency_score=analytics.get("efficiency_score", 100),
-                    is_stressed=analytics.get("is_stressed", False),
-                    cpu_rate=analytics.get("cpu_rate", 0),
-                    anomaly_count=analytics.get("anomaly_count_recent", 0)
-                )
+                detector_entries.append((cid, cpu_percent, mem, mem_limit, is_throttled))
+            
+            # Feed the ML anomaly detector in one worker-thread call so its
+            # windowed statistics never stall WebSocket I/O on the loop
+            anomalies_by_id, analytics_by_id, all_analytics = await asyncio.get_running_loop().run_in_executor(
+                None, detector.process_tick, detector_entries
+            )
+            
+            # CSV rows for history with enhanced data
+            anomaly_rows = [(cid, a) for cid, found in anomalies_by_id.items() for a in found]
+            metric_rows = []
+            for c in containers:
+                cid = c["id"]
+                m = metrics_by_id[cid]
+                analytics = analytics_by_id[cid]
+                metric_rows.append(MetricRow(
+                    cid, c["name"], m["cpu_percent"], m["memory_bytes"],
+                    m["memory_percent"], m["memory_limit_bytes"], m["pids"],
+                    analytics.get("health_score", 100),
+                    analytics.get("stability_score", 100),
+                    analytics.get("efficiency_score", 100),
+                    analytics.get("is_stressed", False),
+                    analytics.get("cpu_rate", 0),
+                    analytics.get("anomaly_count_recent", 0)
+                ))
+            
+            # Hand the tick's rows to the background CSV writer
+            csv_writer.submit(metric_rows, anomaly_rows)
             
-            # Get anomalies for broadcast
-            all_analytics = detector.get_all_analytics()
+            # Release fds of containers that disappeared since the last tick
+            cgroup_files.prune({c["id"] for c in containers})
             
             # Build enhanced payload for frontend - include ALL containers
             container_analytics = {}
+            health_scores, stability_scores, efficiency_scores = {}, {}, {}
             for c in containers:
                 cid = c["id"]
-                if c.get("state") == "running" and cid in metrics_by_id:
-                    # Running container - get actual analytics
-                    a = detector.get_container_analytics(cid)
+                if c.get("state") == "running" and cid in analytics_by_id:
+                    # Running container - actual analytics from this tick
+                    a = analytics_by_id[cid]
                     container_analytics[cid] = {
                         "health_score": a.get("health_score", 100),
                         "stability_score": a.get("stability_score", 100),
@@ -269,6 +1132,10 @@ async def metrics_broadcast_task():
                         "trend": {"direction": "stable", "description": "Container stopped"},
                         "prediction": {"value": 0, "confidence": 0}
                     }
+                scores = container_analytics[cid]
+                health_scores[cid] = scores["health_score"]
+                stability_scores[cid] = scores["stability_score"]
+                efficiency_scores[cid] = scores["efficiency_score"]
             
             payload = {
                 "type": "metrics",
@@ -276,22 +1143,27 @@ async def metrics_broadcast_task():
                 "containers": containers,
                 "metrics": metrics_by_id,
                 "anomalies": all_analytics.get("global_anomalies", [])[-5:],
-                "health_scores": {cid: container_analytics[cid]["health_score"] for cid in container_analytics},
-                "stability_scores": {cid: container_analytics[cid]["stability_score"] for cid in container_analytics},
-                "efficiency_scores": {cid: container_analytics[cid]["efficiency_score"] for cid in container_analytics},
+                "health_scores": health_scores,
+                "stability_scores": stability_scores,
+                "efficiency_scores": efficiency_scores,
                 "container_analytics": container_analytics,
                 "system_stats": all_analytics.get("system_stats", {})
             }
             await ws_manager.broadcast(payload)
-        await asyncio.sleep(1)
+        await clock.wait()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    app.state.index_html, app.state.index_etag = load_dashboard_index()
+    container_watcher.start()
     collector.start(interval=1.0)
+    writer_task = asyncio.create_task(csv_writer.run())
     task = asyncio.create_task(metrics_broadcast_task())
     yield
     task.cancel()
+    writer_task.cancel()
     collector.stop()
+    container_watcher.stop()
 
 app = FastAPI(title="KernelSight API", version="1.0.0", lifespan=lifespan)
 
@@ -308,30 +1180,42 @@ app.add_middleware(
 if DASHBOARD_DIST.exists() and (DASHBOARD_DIST / "assets").exists():
     app.mount("/assets", StaticFiles(directory=DASHBOARD_DIST / "assets"), name="assets")
 
+def load_dashboard_index() -> tuple:
+    """Read the built index.html once, returning (bytes, etag) or (None, None)"""
+    try:
+        html = (DASHBOARD_DIST / "index.html").read_bytes()
+    except OSError:
+        return None, None
+    return html, '"%s"' % hashlib.blake2b(html, digest_size=8).hexdigest()
+
 @app.get("/")
-def root():
-    """Serve the dashboard"""
-    index_file = DASHBOARD_DIST / "index.html"
-    if index_file.exists():
-        return FileResponse(index_file)
+def root(request: Request):
+    """Serve the dashboard from memory (loaded at startup)"""
+    html = getattr(app.state, "index_html", None)
+    if html is not None:
+        etag = app.state.index_etag
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(content=html, media_type="text/html", headers=headers)
     return {"name": "KernelSight API", "version": "1.0.0", "dashboard": "Run 'npm run build' in dashboard folder"}
 
 @app.get("/api/containers", response_model=List[ContainerResponse])
-def list_containers():
+async def list_containers():
     """List all containers"""
     containers = get_running_containers()
     return [ContainerResponse(**c) for c in containers]
 
 @app.get("/api/containers/{container_id}")
-def get_container(container_id: str):
+async def get_container(container_id: str):
     """Get container details"""
-    for c in get_running_containers():
-        if c["id"] == container_id or c["id"].startswith(container_id):
-            return c
+    container = get_container_by_id(container_id)
+    if container is not None:
+        return container
     raise HTTPException(status_code=404, detail="Container not found")
 
 @app.post("/api/containers", response_model=ContainerResponse)
-def create_container(config: ContainerCreate):
+async def create_container(config: ContainerCreate):
     """Create a container (without starting it)"""
     import random
     
@@ -345,45 +1229,45 @@ def create_container(config: ContainerCreate):
     # Generate container name/ID
     container_name = config.name or f"container-{random.randint(1000,9999)}"
     
-    # Create cgroup for this container
+    # Cgroup for this container
     cgroup_path = f"/sys/fs/cgroup/kernelsight/{container_name}"
-    subprocess.run(["sudo", "mkdir", "-p", cgroup_path], check=False)
     
-    # Set resource limits
+    # Resource limits
     mem_limit = config.memory_limit or 268435456
     cpu_pct = config.cpu_percent or 50
     pids_max = config.pids_max or 100
     
-    subprocess.run(f"echo {mem_limit} | sudo tee {cgroup_path}/memory.max", shell=True, capture_output=True)
-    subprocess.run(f"echo '{cpu_pct}000 100000' | sudo tee {cgroup_path}/cpu.max", shell=True, capture_output=True)
-    subprocess.run(f"echo {pids_max} | sudo tee {cgroup_path}/pids.max", shell=True, capture_output=True)
-    
-    # Create init script (for when container is started)
+    # Init script (for when container is started)
     init_script = f"""#!/bin/sh
 echo "Container {container_name} started"
 trap 'exit 0' TERM INT
 while true; do sleep 1; done
 """
-    
-    # Write init script
     init_path = f"{rootfs}/tmp/init_{container_name}.sh"
-    subprocess.run(["sudo", "mkdir", "-p", f"{rootfs}/tmp"], check=False)
-    
-    with open("/tmp/init_temp.sh", "w") as f:
-        f.write(init_script)
-    subprocess.run(["sudo", "cp", "/tmp/init_temp.sh", init_path], check=False)
-    subprocess.run(["sudo", "chmod", "755", init_path], check=False)
     
-    # Save state as "created" (not running)
+    # State as "created" (not running)
     state_dir = f"/var/lib/kernelsight/containers/{container_name}"
-    subprocess.run(["sudo", "mkdir", "-p", state_dir], check=False)
-    state = f"id={container_name}\\nname={container_name}\\nstate=created\\npid=0\\nrootfs={rootfs}"
-    subprocess.run(f"printf '{state}' | sudo tee {state_dir}/state.txt > /dev/null", shell=True)
+    state = f"id={container_name}\nname={container_name}\nstate=created\npid=0\nrootfs={rootfs}"
+    
+    # All directories and files in one privileged step; state.txt goes last
+    # so watchers never see a container whose cgroup is not set up yet
+    await write_files_privileged(
+        [cgroup_path, f"{rootfs}/tmp", state_dir],
+        [
+            (f"{cgroup_path}/memory.max", f"{mem_limit}\n", None),
+            (f"{cgroup_path}/cpu.max", f"{cpu_pct}000 100000\n", None),
+            (f"{cgroup_path}/pids.max", f"{pids_max}\n", None),
+            (init_path, init_script, "755"),
+            (f"{state_dir}/state.txt", state, None),
+        ]
+    )
+    cgroup_files.set_mem_limit(container_name, mem_limit)
+    container_cache.invalidate()
     
     return ContainerResponse(id=container_name, name=container_name, state="created", pid=0)
 
 @app.post("/api/containers/{container_id}/start")
-def start_container(container_id: str):
+async def start_container(container_id: str):
     """Start a container using the C runtime"""
     state_file = Path(f"/var/lib/kernelsight/containers/{container_id}/state.txt")
     if not state_file.exists():
@@ -393,112 +1277,155 @@ def start_container(container_id: str):
     memory_limit = "268435456" # 256MB in bytes
     
     try:
-        for line in state_file.read_text().splitlines():
-            if line.startswith("rootfs="):
-                rootfs = line.split("=", 1)[1]
+        rootfs = read_state_file(str(state_file)).get("rootfs", rootfs)
     except:
         pass
     
-    cgroup_path = f"/sys/fs/cgroup/kernelsight/{container_id}"
-    
     # Use the C runtime for proper namespace isolation with pivot_root
-    def run_container():
-        try:
-            # Use C runtime which has proper mount namespace + pivot_root
-            # Run as background process with infinite loop to keep container alive
-            cmd = [
-                "sudo", str(RUNTIME_PATH), "run",
-                "--name", container_id,
-                "--rootfs", rootfs,
-                "--memory", memory_limit,
-                "--cmd", "/bin/sh -c 'exec tail -f /dev/null'"  # Keep container alive without forking
-            ]
-            # Start process in background without waiting
-            with open("runtime.log", "a") as err:
-                subprocess.Popen(cmd, stdout=err, stderr=err, stdin=subprocess.DEVNULL)
-        except Exception as e:
-            print(f"Error starting container: {e}")
-            pass
-    
-    thread = threading.Thread(target=run_container, daemon=True)
-    thread.start()
+    try:
+        # Run as background process with infinite loop to keep container alive
+        cmd = SUDO + [
+            RUNTIME_BIN, "run",
+            "--name", container_id,
+            "--rootfs", rootfs,
+            "--memory", memory_limit,
+            "--cmd", "/bin/sh -c 'exec tail -f /dev/null'"  # Keep container alive without forking
+        ]
+        # Start process in background without waiting
+        with open("runtime.log", "a") as err:
+            await asyncio.create_subprocess_exec(*cmd, stdout=err, stderr=err,
+                                                 stdin=subprocess.DEVNULL, env=RUNTIME_ENV)
+    except Exception as e:
+        print(f"Error starting container: {e}")
     
     # Wait for process to start
-    time.sleep(1.0)
+    await asyncio.sleep(1.0)
+    
+    # The runtime rewrites memory.max with the limit passed above, and the
+    # cgroup just gained its init process
+    cgroup_files.set_mem_limit(container_id, int(memory_limit))
+    cgroup_files.invalidate(container_id)
     
     # Get PID
     pid = 0
     try:
-        result = subprocess.run(["cat", f"{cgroup_path}/cgroup.procs"], capture_output=True, text=True)
-        procs = result.stdout.strip()
+        procs = cgroup_files.read(container_id, "procs").split()
         if procs:
-            pid = int(procs.split('\n')[0])
+            pid = int(procs[0])
     except:
         pass
     
     # Update state
-    state = f"id={container_id}\\nname={container_id}\\nstate=running\\npid={pid}\\nrootfs={rootfs}"
-    subprocess.run(f"printf '{state}' | sudo tee {state_file} > /dev/null", shell=True)
+    state = f"id={container_id}\nname={container_id}\nstate=running\npid={pid}\nrootfs={rootfs}"
+    await write_privileged(str(state_file), state)
+    container_cache.invalidate()
     
     return {"status": "started", "pid": pid}
 
 @app.post("/api/containers/{container_id}/stop")
-def stop_container(container_id: str):
+async def stop_container(container_id: str):
     """Stop a container - kill all processes in cgroup and reset ML stats"""
     # Find container to get PID
-    containers = get_running_containers()
-    target_container = None
-    for c in containers:
-        if c["id"] == container_id or c["id"].startswith(container_id) or c["name"] == container_id:
-            target_container = c
-            break
+    target_container = get_container_by_id(container_id, match_name=True)
     
     if target_container:
-        # Kill main PID
-        if target_container["pid"] > 0:
-            os.system(f"sudo kill -9 {target_container['pid']} 2>/dev/null")
-        
-        # Kill all processes in the cgroup
-        cgroup_procs = CGROUP_BASE / container_id / "cgroup.procs"
-        if cgroup_procs.exists():
+        # Kill the main PID and everything in the cgroup: one cgroup.kill
+        # write when the kernel supports it (the main PID is in the cgroup),
+        # else one kill for all pids
+        if not await kill_cgroup(container_id):
+            pids = [target_container["pid"]] if target_container["pid"] > 0 else []
             try:
-                pids = cgroup_procs.read_text().strip().split('\n')
-                for pid in pids:
-                    if pid.strip():
-                        os.system(f"sudo kill -9 {pid.strip()} 2>/dev/null")
+                pids += [int(p) for p in cgroup_files.read(container_id, "procs", 65536).split()]
             except:
                 pass
+            await kill_pids(pids)
         
         # Update state file to stopped
-        state_file = Path(f"/var/lib/kernelsight/containers/{container_id}/state.txt")
-        if state_file.exists():
-            try:
-                content = state_file.read_text()
-                new_content = content.replace("state=running", "state=stopped")
-                new_content = new_content.replace(f"pid={target_container['pid']}", "pid=0")
-                state_file.write_text(new_content)
-            except:
-                pass
+        state_file = f"{STATE_DIR}/{container_id}/state.txt"
+        try:
+            with open(state_file) as f:
+                content = f.read()
+            new_content = content.replace("state=running", "state=stopped")
+            new_content = new_content.replace(f"pid={target_container['pid']}", "pid=0")
+            await write_privileged(state_file, new_content)
+        except:
+            pass
     
-    # Reset ML analytics for this container (scores go back to 100)
-    detector.reset_container(container_id)
+    # Reset ML analytics for this container (scores go back to 100) and
+    # drop its cached init pid without waiting for the cgroup.events wakeup.
+    # The reset waits on the detector lock, which process_tick holds for a
+    # whole tick, so it runs in a worker thread rather than on the loop
+    await asyncio.get_running_loop().run_in_executor(None, detector.reset_container, container_id)
+    cgroup_files.invalidate(container_id)
     
-    run_runtime_command(["stop", container_id])
+    await run_runtime_command(["stop", container_id])
+    container_cache.invalidate()
     return {"status": "stopped"}
 
 @app.delete("/api/containers/{container_id}")
-def delete_container(container_id: str):
+async def delete_container(container_id: str):
     """Delete a container"""
     try:
-        stop_container(container_id)
+        await stop_container(container_id)
     except:
         pass
     
-    code, stdout, stderr = run_runtime_command(["delete", container_id])
+    code, stdout, stderr = await run_runtime_command(["delete", container_id])
+    cgroup_files.close(container_id)
+    container_cache.invalidate()
     if code != 0:
         raise HTTPException(status_code=500, detail=f"Failed to delete: {stderr}")
     return {"status": "deleted"}
 
+# Background exec tasks, referenced so they are not garbage collected mid-run
+_exec_tasks = set()
+
+async def _spawn_in_cgroup(cgroup_path: str, rootfs: str):
+    """Start /bin/sh inside the container's cgroup and chroot, reading the command from stdin"""
+    # The shell moves itself into the cgroup before exec'ing the chroot;
+    # no preexec_fn, which can deadlock the forked child of a threaded server.
+    # SUDO is empty when the API already runs as root
+    return await asyncio.create_subprocess_exec(
+        *SUDO, "/bin/sh", "-c",
+        'echo $$ > "$1/cgroup.procs" && exec chroot "$2" /bin/sh',
+        "sh", cgroup_path, rootfs,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+
+async def _run_exec(container_id: str, cgroup_path: str, rootfs: str, command: str):
+    """Run one exec request to completion and log its output"""
+    try:
+        proc = await _spawn_in_cgroup(cgroup_path, rootfs)
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(command.encode()), 300)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            print(f"[CONTAINER {container_id}] Command timed out after 300s")
+            return
+        stdout = stdout.decode(errors="replace")
+        
+        # Print command output to backend terminal
+        if stdout.strip():
+            print(f"\n{'='*60}")
+            print(f"[CONTAINER {container_id}] Command Output:")
+            print(f"{'='*60}")
+            for line in stdout.strip().split('\n'):
+                print(f"  {line}")
+            print(f"{'='*60}\n")
+        
+        if proc.returncode != 0:
+            # Filter out verbose noisy shell errors if command still "worked" (like fork bomb)
+            stderr = stderr.decode(errors="replace").strip()
+            if "can't fork" in stderr or "Killed" in stderr:
+                print(f"[CONTAINER {container_id}] Command hit resource limits (exit code {proc.returncode})")
+            elif stderr:
+                print(f"[CONTAINER {container_id}] Error: {stderr[:200]}")
+        else:
+            print(f"[CONTAINER {container_id}] Command completed successfully")
+    except Exception as e:
+        print(f"[CONTAINER {container_id}] Exec failed: {e}")
+
 @app.post("/api/containers/{container_id}/exec")
 async def exec_in_container(container_id: str, request: Request):
     """Execute a command inside an existing container's cgroup"""
@@ -522,95 +1449,48 @@ async def exec_in_container(container_id: str, request: Request):
     if not Path(cgroup_path).exists():
         return {"status": "error", "message": f"Container not found: {container_id}", "output": ""}
     
-    # Write command to a script
-    import random, string
-    exec_id = ''.join(random.choices(string.ascii_lowercase, k=6))
-    script_name = f"exec_{exec_id}.sh"
-    script_path = f"{DEFAULT_ROOTFS}/tmp/{script_name}"
-    
     # Run the command ASYNCHRONOUSLY in background
-    import threading
-    def run_in_cgroup():
-        try:
-            # Get the first PID in the container's cgroup to use as target for nsenter
-            procs_file = f"{cgroup_path}/cgroup.procs"
-            target_pid = None
-            try:
-                with open(procs_file, 'r') as f:
-                    procs = f.read().strip().split('\n')
-                    if procs and procs[0]:
-                        target_pid = procs[0]
-            except:
-                pass
-            
-            # Determine base command - use simple chroot + cgroup approach
-            # Skip namespace isolation to ensure file writes persist to rootfs
-            base_cmd = f"sudo bash -c 'echo $$ > {cgroup_path}/cgroup.procs && exec chroot {DEFAULT_ROOTFS} /bin/sh'"
-            
-            # Execute command by piping the string to the shell
-            res = subprocess.run(base_cmd, input=command, shell=True, timeout=300, capture_output=True, text=True)
-            
-            # Print command output to backend terminal
-            if res.stdout.strip():
-                print(f"\n{'='*60}")
-                print(f"[CONTAINER {container_id}] Command Output:")
-                print(f"{'='*60}")
-                for line in res.stdout.strip().split('\n'):
-                    print(f"  {line}")
-                print(f"{'='*60}\n")
-            
-            if res.returncode != 0:
-                # Filter out verbose noisy shell errors if command still "worked" (like fork bomb)
-                stderr = res.stderr.strip()
-                if "can't fork" in stderr or "Killed" in stderr:
-                    print(f"[CONTAINER {container_id}] Command hit resource limits (exit code {res.returncode})")
-                elif stderr:
-                    print(f"[CONTAINER {container_id}] Error: {stderr[:200]}")
-            else:
-                print(f"[CONTAINER {container_id}] Command completed successfully")
-        except subprocess.TimeoutExpired:
-            print(f"[CONTAINER {container_id}] Command timed out after 300s")
-        except Exception as e:
-            print(f"[CONTAINER {container_id}] Exec failed: {e}")
-    
-    # Start in background thread
-    thread = threading.Thread(target=run_in_cgroup, daemon=True)
-    thread.start()
+    task = asyncio.create_task(_run_exec(container_id, cgroup_path, DEFAULT_ROOTFS, command))
+    _exec_tasks.add(task)
+    task.add_done_callback(_exec_tasks.discard)
     
     return {"status": "started", "message": f"Command started in background", "output": "", "exit_code": 0}
 
 @app.get("/api/containers/{container_id}/metrics")
-def get_container_metrics(container_id: str):
+async def get_container_metrics(container_id: str):
     """Get metrics for a container"""
-    cgroup = CGROUP_BASE / container_id
     metrics = {"cpu_percent": 0, "memory_bytes": 0, "memory_limit_bytes": 0, "pids": 0}
     
-    if cgroup.exists():
-        try:
-            metrics["memory_bytes"] = int((cgroup / "memory.current").read_text().strip())
-            val = (cgroup / "memory.max").read_text().strip()
-            metrics["memory_limit_bytes"] = 0 if val == "max" else int(val)
-            metrics["pids"] = int((cgroup / "pids.current").read_text().strip())
-        except:
-            pass
+    try:
+        metrics["memory_bytes"] = cgroup_files.read_int(container_id, "mem")
+        metrics["memory_limit_bytes"] = cgroup_files.mem_limit(container_id) or 0
+        metrics["pids"] = cgroup_files.read_int(container_id, "pids")
+    except:
+        pass
     
-    history = collector.get_history(container_id)
+    timestamps, cpu, mem = collector.get_series(container_id, 30)
     return {
         "current": metrics,
-        "history": [{"timestamp": p.timestamp, "cpu_percent": p.cpu_percent, 
-                     "memory_bytes": p.memory_bytes} for p in history[-30:]]
+        "history": [{"timestamp": t, "cpu_percent": c, "memory_bytes": m}
+                    for t, c, m in zip(timestamps, cpu, mem)]
     }
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time metrics"""
-    await ws_manager.connect(websocket)
+    """WebSocket endpoint for real-time metrics
+    
+    Pass ?codec=deflate to receive metrics as raw-deflate binary frames.
+    """
+    codec = websocket.query_params.get("codec", "json")
+    await ws_manager.connect(websocket, codec if codec in CODECS else "json")
     try:
         while True:
             data = await websocket.receive_text()
+            ws_manager.touch(websocket)
             msg = json.loads(data)
             if msg.get("type") == "ping":
-                await websocket.send_json({"type": "pong"})
+                # Goes through the client's queue so it never races a broadcast send
+                ws_manager.send(websocket, PONG_MESSAGE)
     except WebSocketDisconnect:
         ws_manager.disconnect(websocket)
 
@@ -704,7 +1584,7 @@ def get_container_processes(container_id: str):
         - The init process (with lowest PID) is the main container process
     """
     processes = process_inspector.get_container_processes(container_id)
-    init_pid = process_inspector.get_init_pid(container_id)
+    init_pid = cgroup_files.init_pid(container_id)
     
     return {
         "container_id": container_id,
@@ -772,6 +1652,12 @@ def export_summary_csv():
         )
     raise HTTPException(status_code=404, detail="No summary data available yet")
 
+# Server settings for the WebSocket feed. permessage-deflate (uvicorn's
+# default) is off: the dashboard asks for ?codec=deflate frames that are
+# compressed once per tick, and deflating them again per connection only
+# costs CPU
+UVICORN_WS_OPTIONS = {"ws": "websockets", "ws_per_message_deflate": False}
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(app, host="0.0.0.0", port=8000, **UVICORN_WS_OPTIONS)
@@ -5,23 +5,22 @@ import sys
 import time
 import subprocess
 import signal
+import select
 import json
-import shutil
+from array import array
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 
 import click
-from rich.console import Console
+from rich.console import Console, Group
 from rich.table import Table
-from rich.live import Live
 from rich.panel import Panel
-from rich.layout import Layout
-from rich.text import Text
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn
-from rich.syntax import Syntax
-from rich.tree import Tree
 from rich import box
 
+from .inotify import Inotify, IN_MODIFY
+from .metrics import parse_cpu_stat
+
 console = Console()
 
 # Runtime path - Use absolute path
@@ -29,6 +28,11 @@ RUNTIME_PATH = Path("/home/student/container/runtime/build/kernelsight-runtime")
 CGROUP_BASE = Path("/sys/fs/cgroup/kernelsight")
 STATE_DIR = Path("/var/lib/kernelsight")
 LOG_DIR = STATE_DIR / "logs"
+CONTAINERS_DIR = STATE_DIR / "containers"
+
+# Runtime command prefix and environment, built once instead of per call
+RUNTIME_CMD = ["sudo", str(RUNTIME_PATH)]
+RUNTIME_ENV = {**os.environ, "LD_LIBRARY_PATH": str(RUNTIME_PATH.parent)}
 
 # ASCII Art Banner
 BANNER = """
@@ -58,6 +62,16 @@ def format_bytes(bytes_val):
         bytes_val /= 1024
     return f"{bytes_val:.1f}PB"
 
+SIZE_SUFFIXES = {"k": 1024, "m": 1024 * 1024, "g": 1024 * 1024 * 1024}
+
+def parse_size(value):
+    """Convert a size like 256m, 1G or 512k to a byte count string
+    
+    Values without a suffix (plain bytes, "max") are passed through.
+    """
+    multiplier = SIZE_SUFFIXES.get(value[-1:].lower())
+    return str(int(value[:-1]) * multiplier) if multiplier else value
+
 def format_duration(seconds):
     """Format seconds to human readable duration"""
     if seconds < 60:
@@ -67,57 +81,186 @@ def format_duration(seconds):
     else:
         return f"{seconds//3600:.0f}h {(seconds%3600)//60:.0f}m"
 
-def run_runtime(args, capture=True):
-    """Run the C runtime CLI"""
-    env = os.environ.copy()
-    env["LD_LIBRARY_PATH"] = str(RUNTIME_PATH.parent)
+SPARK_CHARS = " ▁▂▃▄▅▆▇█"
+
+# Every possible 30-cell usage bar, indexed by the number of filled cells
+BARS = tuple("█" * i + "░" * (30 - i) for i in range(31))
+
+def render_bar(percent):
+    """30-cell usage bar for a 0-100 percentage"""
+    return BARS[max(0, min(int(percent / 3.33), 30))]
+
+# Usage color per 10% band: green below 50%, yellow below 80%, red above
+USAGE_COLORS = ("green",) * 5 + ("yellow",) * 3 + ("red",) * 3
+
+def usage_color(percent):
+    """Color for a 0-100 usage percentage"""
+    return USAGE_COLORS[max(0, min(int(percent) // 10, 10))]
+
+def render_spark(values):
+    """Spark line of a series scaled to its peak, one character per value"""
+    peak = max(values)
+    scale = 8 / peak if peak > 0 else 0
+    return "".join([SPARK_CHARS[max(0, min(int(v * scale), 8))] for v in values])
+
+def run_runtime(args, capture=True, text=True):
+    """Run the C runtime CLI
     
-    cmd = ["sudo", str(RUNTIME_PATH)] + args
+    With text=False the captured output is returned as raw bytes, for
+    callers that parse it rather than print it.
+    """
+    cmd = RUNTIME_CMD + args
     if capture:
-        result = subprocess.run(cmd, capture_output=True, text=True, env=env)
+        result = subprocess.run(cmd, capture_output=True, text=text, env=RUNTIME_ENV)
         return result.returncode, result.stdout, result.stderr
     else:
-        return subprocess.run(cmd, env=env).returncode, "", ""
+        return subprocess.run(cmd, env=RUNTIME_ENV).returncode, "", ""
 
-def get_container_metrics(container_id):
-    """Get metrics from cgroup files"""
-    cgroup = CGROUP_BASE / container_id
-    metrics = {"cpu_percent": 0, "memory_mb": 0, "memory_limit_mb": 0, "pids": 0, "pids_max": 0}
-    
+# Runs `runtime delete` once per id inside a single sudo, printing each exit code
+_DELETE_SCRIPT = r"""
+rt=$1; shift
+for id; do "$rt" delete "$id" >/dev/null 2>&1; echo $?; done
+"""
+
+def delete_containers(container_ids):
+    """Delete several containers paying for sudo once; returns {id: exit code}"""
+    result = subprocess.run(["sudo", "/bin/sh", "-c", _DELETE_SCRIPT, "sh", str(RUNTIME_PATH), *container_ids],
+                            capture_output=True, env=RUNTIME_ENV)
+    codes = [int(code) for code in result.stdout.split()]
+    # Ids after a sudo failure or a short output count as failed
+    return {cid: codes[i] if i < len(codes) else 1 for i, cid in enumerate(container_ids)}
+
+# (container id, file name) -> fd kept open for the life of the process.
+# cgroup files regenerate on every read from offset 0, so repeat samples
+# (monitor, ps over many containers) are one pread instead of open+read+close
+_cgroup_fds = {}
+
+def read_cgroup_file(container_id, name):
+    """Raw bytes of a cgroup file via a cached fd, None if it does not exist"""
+    key = (container_id, name)
+    for _ in range(2):
+        fd = _cgroup_fds.get(key)
+        if fd is None:
+            try:
+                fd = os.open(f"{CGROUP_BASE}/{container_id}/{name}", os.O_RDONLY | os.O_CLOEXEC)
+            except OSError:
+                return None
+            _cgroup_fds[key] = fd
+        try:
+            return os.pread(fd, 4096, 0)
+        except OSError:
+            # Cgroup was removed or recreated: reopen once
+            del _cgroup_fds[key]
+            os.close(fd)
+    return None
+
+def get_container_limits(container_id):
+    """Read the memory, PID and CPU limits, which only change on create/update"""
+    limits = {}
     try:
-        mem = cgroup / "memory.current"
-        if mem.exists():
-            metrics["memory_mb"] = int(mem.read_text().strip()) / 1048576
+        data = read_cgroup_file(container_id, "memory.max")
+        if data is not None:
+            limits["memory_limit_mb"] = -1 if data.strip() == b"max" else int(data) / 1048576
         
-        mem_max = cgroup / "memory.max"
-        if mem_max.exists():
-            val = mem_max.read_text().strip()
-            metrics["memory_limit_mb"] = -1 if val == "max" else int(val) / 1048576
+        data = read_cgroup_file(container_id, "pids.max")
+        if data is not None:
+            limits["pids_max"] = 0 if data.strip() == b"max" else int(data)
         
-        pids = cgroup / "pids.current"
-        if pids.exists():
-            metrics["pids"] = int(pids.read_text().strip())
+        # Get CPU max limit
+        data = read_cgroup_file(container_id, "cpu.max")
+        if data is not None:
+            val = data.split()[0]
+            limits["cpu_max"] = int(val) if val != b"max" else 100000
+    except:
+        pass
+    return limits
+
+def get_container_metrics(container_id, limits=None):
+    """Get metrics from cgroup files
+    
+    Pass `limits` from an earlier get_container_limits() call to skip
+    re-reading the limit files.
+    """
+    metrics = {"cpu_percent": 0, "memory_mb": 0, "memory_limit_mb": 0, "pids": 0, "pids_max": 0}
+    
+    try:
+        data = read_cgroup_file(container_id, "memory.current")
+        if data is not None:
+            metrics["memory_mb"] = int(data) / 1048576
         
-        pids_max = cgroup / "pids.max"
-        if pids_max.exists():
-            val = pids_max.read_text().strip()
-            metrics["pids_max"] = 0 if val == "max" else int(val)
+        data = read_cgroup_file(container_id, "pids.current")
+        if data is not None:
+            metrics["pids"] = int(data)
             
-        cpu = cgroup / "cpu.stat"
-        if cpu.exists():
-            for line in cpu.read_text().splitlines():
-                if line.startswith("usage_usec"):
-                    metrics["cpu_usec"] = int(line.split()[1])
-                    
-        # Get CPU max limit
-        cpu_max = cgroup / "cpu.max"
-        if cpu_max.exists():
-            val = cpu_max.read_text().strip().split()[0]
-            metrics["cpu_max"] = int(val) if val != "max" else 100000
+        data = read_cgroup_file(container_id, "cpu.stat")
+        if data is not None:
+            metrics["cpu_usec"], _ = parse_cpu_stat(data)
     except:
         pass
+    metrics.update(limits if limits is not None else get_container_limits(container_id))
     return metrics
 
+# monitor re-reads memory.max/pids.max/cpu.max only every this many ticks
+LIMIT_RECHECK_TICKS = 10
+
+# Above this many containers, metrics are read from a small thread pool:
+# the open()/pread() syscalls release the GIL and overlap
+PARALLEL_METRICS_AT = 16
+
+def follow_log(f):
+    """Yield lines appended to an open log file, like `tail -f`
+    
+    Sleeps in poll() on an inotify IN_MODIFY watch between writes instead
+    of spawning tail. A partial last line is held back until it completes.
+    """
+    watcher = Inotify()
+    try:
+        watcher.add_watch(f.name, IN_MODIFY)
+        poller = select.poll()
+        poller.register(watcher.fd, select.POLLIN)
+        pending = ""
+        while True:
+            data = f.read()
+            if data:
+                lines = (pending + data).split("\n")
+                pending = lines.pop()
+                yield from lines
+            elif os.fstat(f.fileno()).st_size < f.tell():
+                # Truncated: start over from the top
+                f.seek(0)
+                pending = ""
+                continue
+            poller.poll()
+            watcher.read_events()
+    finally:
+        watcher.close()
+
+def open_cgroup_events(container_id):
+    """Poll object woken when the container's cgroup.events or memory.events change
+    
+    Both files notify pollers with POLLPRI (exit, OOM, memory.high hits),
+    so the monitor can redraw right away instead of at the next tick.
+    Returns (poll, {fd: name}); the dict is empty if the files are missing.
+    """
+    poller = select.poll()
+    fds = {}
+    for name in ("cgroup.events", "memory.events"):
+        try:
+            fd = os.open(CGROUP_BASE / container_id / name, os.O_RDONLY | os.O_CLOEXEC)
+        except OSError:
+            continue
+        poller.register(fd, select.POLLPRI)
+        fds[fd] = name
+    return poller, fds
+
+def get_metrics_for(container_ids):
+    """Map each container id to get_container_metrics(), in parallel for large lists"""
+    if len(container_ids) <= PARALLEL_METRICS_AT:
+        return {cid: get_container_metrics(cid) for cid in container_ids}
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        return dict(zip(container_ids, pool.map(get_container_metrics, container_ids)))
+
 def check_root():
     """Check if running as root"""
     if os.geteuid() != 0:
@@ -131,25 +274,78 @@ def check_runtime():
         return False
     return True
 
+def read_container_state(state_dir):
+    """Parse one container's state.txt into a list entry (OSError if unreadable)"""
+    with open(f"{state_dir}/state.txt", "rb") as f:
+        raw = f.read()
+    data = {}
+    for line in raw.splitlines():
+        key, sep, val = line.partition(b"=")
+        if sep:
+            data[key.decode()] = val.decode().strip()
+    state = data.get("state")
+    return {
+        "id": data.get("id", ""),
+        "name": data.get("name", ""),
+        "status": state if state in ("running", "stopped") else "created",
+        "pid": data.get("pid", "0")
+    }
+
+def read_container_states():
+    """Parse every container's state.txt directly, the same data `runtime list` prints"""
+    containers = []
+    with os.scandir(CONTAINERS_DIR) as entries:
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            try:
+                containers.append(read_container_state(entry.path))
+            except PermissionError:
+                # Written under a restrictive umask: let the caller fall
+                # back to `runtime list` rather than under-report
+                raise
+            except OSError:
+                continue
+    return containers
+
 def get_container_list():
     """Get list of containers as structured data"""
-    code, stdout, stderr = run_runtime(["list"])
+    # State files are world-readable: skip the sudo + runtime exec when possible
+    try:
+        return read_container_states()
+    except FileNotFoundError:
+        return []
+    except OSError:
+        pass
+    
+    code, stdout, stderr = run_runtime(["list"], text=False)
     containers = []
     if code == 0:
-        lines = stdout.strip().split("\n")
-        for line in lines[2:]:
-            if not line.strip():
-                continue
+        # Split the raw bytes and decode only the four fields that are kept
+        for line in stdout.split(b"\n")[2:]:
             parts = line.split()
             if len(parts) >= 4:
                 containers.append({
-                    "id": parts[0],
-                    "name": parts[1],
-                    "status": parts[2],
-                    "pid": parts[3] if len(parts) > 3 else "0"
+                    "id": parts[0].decode(),
+                    "name": parts[1].decode(errors="replace"),
+                    "status": parts[2].decode(),
+                    "pid": parts[3].decode()
                 })
     return containers
 
+def find_container(container):
+    """Look a container up by name or id
+    
+    State dirs are named by id, so an id reads just that one state file;
+    only a name needs the full list.
+    """
+    if container and "/" not in container and not container.startswith("."):
+        try:
+            return read_container_state(CONTAINERS_DIR / container)
+        except OSError:
+            pass
+    return next((c for c in get_container_list() if c["name"] == container or c["id"] == container), None)
+
 @click.group(invoke_without_command=True)
 @click.option("--version", "-v", is_flag=True, help="Show version")
 @click.pass_context
@@ -205,16 +401,7 @@ def create(name, rootfs, memory, cpus, pids, cmd, env):
         return
     
     args = ["create", "--name", name, "--rootfs", rootfs]
-    
-    # Parse memory
-    mem_bytes = memory
-    if memory.endswith('m') or memory.endswith('M'):
-        mem_bytes = str(int(memory[:-1]) * 1024 * 1024)
-    elif memory.endswith('g') or memory.endswith('G'):
-        mem_bytes = str(int(memory[:-1]) * 1024 * 1024 * 1024)
-    elif memory.endswith('k') or memory.endswith('K'):
-        mem_bytes = str(int(memory[:-1]) * 1024)
-    args.extend(["--memory", mem_bytes])
+    args.extend(["--memory", parse_size(memory)])
     args.extend(["--cpus", str(int(cpus * 100))])
     args.extend(["--pids", str(pids)])
     
@@ -224,6 +411,8 @@ def create(name, rootfs, memory, cpus, pids, cmd, env):
     console.print(f"\n[bold cyan]📦 Creating Container[/bold cyan]")
     console.print(f"[dim]{'─' * 40}[/dim]")
     
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
@@ -277,6 +466,8 @@ def start(container, detach, timeout):
     if timeout > 0:
         console.print(f"[yellow]⏱ Container will auto-stop after {timeout} seconds[/yellow]")
     
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
@@ -315,6 +506,8 @@ def stop(container, force, timeout):
     
     signal_type = "SIGKILL" if force else "SIGTERM"
     
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
@@ -379,8 +572,7 @@ def rm(container, force, volumes):
         return
     
     # Check if container is running
-    containers = get_container_list()
-    target = next((c for c in containers if c["name"] == container or c["id"] == container), None)
+    target = find_container(container)
     
     if target and target["status"] == "running":
         if not force:
@@ -427,10 +619,13 @@ def ps(show_all, quiet, fmt):
             console.print(c["id"][:12])
         return
     
+    # Metrics for every running container, fetched up front in one batch
+    metrics_by_id = get_metrics_for([c["id"] for c in containers if c["status"] == "running"])
+    
     if fmt == "json":
         for c in containers:
             if c["status"] == "running":
-                c["metrics"] = get_container_metrics(c["id"])
+                c["metrics"] = metrics_by_id[c["id"]]
         console.print(json.dumps(containers, indent=2))
         return
     
@@ -454,7 +649,7 @@ def ps(show_all, quiet, fmt):
         pids_str = "-"
         
         if status == "running":
-            metrics = get_container_metrics(c["id"])
+            metrics = metrics_by_id[c["id"]]
             if metrics["memory_mb"] > 0:
                 limit = metrics.get("memory_limit_mb", 0)
                 if limit > 0:
@@ -491,12 +686,14 @@ def monitor(container, interval, count):
       kernelsight monitor myapp -i 0.5   # Update every 0.5 seconds
       kernelsight monitor myapp -n 10    # Show 10 updates then exit
     """
+    from rich.live import Live
+    from rich.text import Text
+    
     console.print(f"\n[bold cyan]📊 Live Monitor: {container}[/bold cyan]")
     console.print("[dim]Press Ctrl+C to exit[/dim]\n")
     
     # Find container ID
-    containers = get_container_list()
-    target = next((c for c in containers if c["name"] == container or c["id"] == container), None)
+    target = find_container(container)
     
     if not target:
         console.print(f"[red]✗ Container '{container}' not found[/red]")
@@ -510,11 +707,38 @@ def monitor(container, interval, count):
     prev_cpu = 0
     prev_time = time.time()
     
-    history = {"cpu": [], "mem": []}
+    # Last 60 CPU samples as unboxed doubles (memory history was never drawn)
+    cpu_history = array("d")
+    
+    # Limits only change through `update`; re-read them every few ticks
+    limits = None
+    tick = 0
+    
+    # Redraw in place: Live only rewrites the lines that changed instead of
+    # clearing and repainting the whole screen every tick
+    live = Live(console=console, auto_refresh=False)
+    
+    # Wait on cgroup events with the interval as timeout, so exits and OOMs
+    # show up immediately while CPU is still sampled once per interval
+    events, event_fds = open_cgroup_events(container_id)
+    exited = False
+    
+    # Ctrl+C only writes to a pipe the poll above also waits on, so a frame
+    # is never torn mid-render and the loop ends at the next wait
+    stop_r, stop_w = os.pipe()
+    os.set_blocking(stop_w, False)
+    events.register(stop_r, select.POLLIN)
+    interrupted = False
+    prev_wakeup_fd = signal.set_wakeup_fd(stop_w)
+    prev_sigint = signal.signal(signal.SIGINT, lambda signum, frame: None)
     
     try:
+        live.start()
         while True:
-            metrics = get_container_metrics(container_id)
+            if tick % LIMIT_RECHECK_TICKS == 0:
+                limits = get_container_limits(container_id)
+            tick += 1
+            metrics = get_container_metrics(container_id, limits)
             current_time = time.time()
             
             # Calculate CPU percentage
@@ -527,18 +751,13 @@ def monitor(container, interval, count):
             prev_time = current_time
             
             # Store history
-            history["cpu"].append(cpu_percent)
-            history["mem"].append(metrics["memory_mb"])
-            if len(history["cpu"]) > 60:
-                history["cpu"].pop(0)
-                history["mem"].pop(0)
-            
-            # Clear and display
-            console.clear()
+            cpu_history.append(cpu_percent)
+            if len(cpu_history) > 60:
+                del cpu_history[0]
             
             # Header
-            console.print(Panel(f"[bold cyan]Container: {container}[/bold cyan] ({container_id[:12]})", 
-                               title="📊 Live Monitor", border_style="blue"))
+            header = Panel(f"[bold cyan]Container: {container}[/bold cyan] ({container_id[:12]})", 
+                           title="📊 Live Monitor", border_style="blue")
             
             # Metrics table
             table = Table(box=box.SIMPLE, show_header=False, padding=(0, 2))
@@ -547,16 +766,16 @@ def monitor(container, interval, count):
             table.add_column("Bar", width=30)
             
             # CPU
-            cpu_bar = "█" * int(min(cpu_percent, 100) / 3.33) + "░" * (30 - int(min(cpu_percent, 100) / 3.33))
-            cpu_color = "green" if cpu_percent < 50 else "yellow" if cpu_percent < 80 else "red"
+            cpu_bar = render_bar(cpu_percent)
+            cpu_color = usage_color(cpu_percent)
             table.add_row("⚡ CPU", f"[{cpu_color}]{cpu_percent:.1f}%[/{cpu_color}]", f"[{cpu_color}]{cpu_bar}[/{cpu_color}]")
             
             # Memory
             mem_percent = 0
             if metrics["memory_limit_mb"] > 0:
                 mem_percent = (metrics["memory_mb"] / metrics["memory_limit_mb"]) * 100
-            mem_bar = "█" * int(min(mem_percent, 100) / 3.33) + "░" * (30 - int(min(mem_percent, 100) / 3.33))
-            mem_color = "green" if mem_percent < 50 else "yellow" if mem_percent < 80 else "red"
+            mem_bar = render_bar(mem_percent)
+            mem_color = usage_color(mem_percent)
             mem_limit_str = f"/{metrics['memory_limit_mb']:.0f}MB" if metrics["memory_limit_mb"] > 0 else ""
             table.add_row("💾 Memory", f"[{mem_color}]{metrics['memory_mb']:.1f}MB{mem_limit_str}[/{mem_color}]", 
                          f"[{mem_color}]{mem_bar}[/{mem_color}]")
@@ -564,25 +783,43 @@ def monitor(container, interval, count):
             # PIDs
             table.add_row("🔢 PIDs", str(metrics["pids"]), "")
             
-            console.print(table)
+            frame = [header, table]
             
             # ASCII Spark Chart for CPU
-            if len(history["cpu"]) > 1:
-                console.print("\n[bold]CPU History (last 60s):[/bold]")
-                spark = ""
-                chars = " ▁▂▃▄▅▆▇█"
-                max_val = max(history["cpu"]) if max(history["cpu"]) > 0 else 1
-                for val in history["cpu"]:
-                    idx = int((val / max_val) * 8) if max_val > 0 else 0
-                    spark += chars[min(idx, 8)]
-                console.print(f"[cyan]{spark}[/cyan]")
+            if len(cpu_history) > 1:
+                frame.append(Text.from_markup("\n[bold]CPU History (last 60s):[/bold]"))
+                frame.append(Text(render_spark(cpu_history), style="cyan"))
             
-            console.print(f"\n[dim]Updating every {interval}s. Press Ctrl+C to exit.[/dim]")
+            frame.append(Text.from_markup(f"\n[dim]Updating every {interval}s. Press Ctrl+C to exit.[/dim]"))
+            live.update(Group(*frame), refresh=True)
             
-            time.sleep(interval)
+            if exited or (count and tick >= count):
+                break
             
-    except KeyboardInterrupt:
-        console.print("\n[dim]Stopped monitoring[/dim]")
+            for fd, _ in events.poll(interval * 1000):
+                if fd == stop_r:
+                    # The wakeup fd receives the number of each caught signal
+                    interrupted = signal.SIGINT in os.read(stop_r, 64)
+                    continue
+                # Re-read to re-arm the notification
+                data = os.pread(fd, 512, 0)
+                if event_fds[fd] == "cgroup.events" and b"populated 0" in data:
+                    exited = True
+            
+            if interrupted:
+                break
+        
+        live.stop()
+        if interrupted:
+            console.print("\n[dim]Stopped monitoring[/dim]")
+        elif exited:
+            console.print(f"\n[yellow]⚠ Container '{container}' exited[/yellow]")
+    finally:
+        live.stop()
+        signal.signal(signal.SIGINT, prev_sigint)
+        signal.set_wakeup_fd(prev_wakeup_fd)
+        for fd in (*event_fds, stop_r, stop_w):
+            os.close(fd)
 
 @cli.command()
 @click.option("--name", "-n", required=True, help="Container name")
@@ -594,11 +831,7 @@ def monitor(container, interval, count):
 def run(name, rootfs, memory, cpus, cmd, duration):
     """Create and run a container (one-shot)"""
     args = ["run", "--name", name, "--rootfs", rootfs]
-    
-    mem_bytes = memory
-    if memory.endswith('m'):
-        mem_bytes = str(int(memory[:-1]) * 1024 * 1024)
-    args.extend(["--memory", mem_bytes])
+    args.extend(["--memory", parse_size(memory)])
     args.extend(["--cpus", str(int(cpus * 100))])
     
     if cmd:
@@ -629,8 +862,9 @@ def inspect(container):
     Examples:
       kernelsight inspect myapp
     """
-    containers = get_container_list()
-    target = next((c for c in containers if c["name"] == container or c["id"] == container), None)
+    from rich.tree import Tree
+    
+    target = find_container(container)
     
     if not target:
         console.print(f"[red]✗ Container '{container}' not found[/red]")
@@ -689,15 +923,17 @@ def logs(container, tail, follow):
     console.print(f"[bold]📜 Logs for {container}[/bold]\n")
     
     try:
-        with open(log_file, "r") as f:
-            lines = f.readlines()
-            for line in lines[-tail:]:
+        with open(log_file, "r", errors="replace") as f:
+            # Keeps only the last `tail` lines in memory, however big the log
+            for line in deque(f, maxlen=tail or None):
                 console.print(f"[dim]{line.rstrip()}[/dim]")
-        
-        if follow:
-            console.print("\n[dim]Following logs... Press Ctrl+C to exit[/dim]")
-            import subprocess
-            subprocess.run(["tail", "-f", str(log_file)])
+            
+            if follow:
+                console.print("\n[dim]Following logs... Press Ctrl+C to exit[/dim]")
+                for line in follow_log(f):
+                    console.print(f"[dim]{line}[/dim]")
+    except KeyboardInterrupt:
+        console.print("\n[dim]Stopped following logs[/dim]")
     except Exception as e:
         console.print(f"[red]Error reading logs: {e}[/red]")
 
@@ -716,8 +952,7 @@ def update(container, key, value):
       kernelsight update myapp cpu 0.5
       kernelsight update myapp pids 200
     """
-    containers = get_container_list()
-    target = next((c for c in containers if c["name"] == container or c["id"] == container), None)
+    target = find_container(container)
     
     if not target:
         console.print(f"[red]✗ Container '{container}' not found[/red]")
@@ -727,12 +962,7 @@ def update(container, key, value):
     
     try:
         if key == "memory":
-            mem_bytes = value
-            if value.endswith('m') or value.endswith('M'):
-                mem_bytes = str(int(value[:-1]) * 1024 * 1024)
-            elif value.endswith('g') or value.endswith('G'):
-                mem_bytes = str(int(value[:-1]) * 1024 * 1024 * 1024)
-            (cgroup / "memory.max").write_text(mem_bytes)
+            (cgroup / "memory.max").write_text(parse_size(value))
             console.print(f"[green]✓ Updated memory limit to {value}[/green]")
         
         elif key == "cpu":
@@ -778,8 +1008,12 @@ def dashboard(port, host):
         title="🐳 Dashboard", border_style="cyan"
     ))
     
-    from .api import app
-    uvicorn.run(app, host=host, port=port, log_level="info")
+    from .api import app, UVICORN_WS_OPTIONS
+    # uvicorn picks uvloop and httptools when installed (uvicorn[standard]).
+    # One worker only: the container cache, detector and WebSocket
+    # broadcaster all live in this process.
+    uvicorn.run(app, host=host, port=port, log_level="info", access_log=False,
+                **UVICORN_WS_OPTIONS)
 
 @cli.command()
 def info():
@@ -815,8 +1049,7 @@ def info():
     health_table.add_row("Runtime Binary", 
                         f"[green]✓ Found[/green]" if runtime_ok else f"[red]✗ Not found at {RUNTIME_PATH}[/red]")
     
-    # State directory
-    state_ok = STATE_DIR.exists() or True  # Will be created
+    # State directory (created on first use)
     health_table.add_row("State Directory", f"[green]✓ {STATE_DIR}[/green]")
     
     # Root privileges
@@ -826,7 +1059,7 @@ def info():
     
     # Container count
     containers = get_container_list()
-    running = len([c for c in containers if c["status"] == "running"])
+    running = sum(1 for c in containers if c["status"] == "running")
     health_table.add_row("Containers", f"{running} running / {len(containers)} total")
     
     console.print(health_table)
@@ -858,9 +1091,9 @@ def prune(force):
             return
     
     removed = 0
+    codes = delete_containers([c["id"] for c in stopped])
     for c in stopped:
-        code, _, _ = run_runtime(["delete", c["id"]])
-        if code == 0:
+        if codes[c["id"]] == 0:
             removed += 1
             console.print(f"[green]✓ Removed {c['name']}[/green]")
     
@@ -1,13 +1,40 @@
 """KernelSight - Container metrics collection"""
 
+import os
 import time
 import threading
-from typing import Dict, List, Callable
-from pathlib import Path
-from collections import deque
+from array import array
+from typing import Dict, List, Callable, Optional, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 
+CGROUP_BASE = "/sys/fs/cgroup/kernelsight"
+
+def read_small(path: str, size: int = 512) -> bytes:
+    """Read a small pseudo-file with raw open/read/close, no file object or decoding"""
+    fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+    try:
+        return os.read(fd, size)
+    finally:
+        os.close(fd)
+
+def _cpu_stat_field(data: bytes, key: bytes) -> int:
+    """Value of one `key value` line in cpu.stat, 0 when absent"""
+    start = data.find(key)
+    if start < 0:
+        return 0
+    start += len(key)
+    end = data.find(b"\n", start)
+    return int(data[start:end] if end >= 0 else data[start:])
+
+def parse_cpu_stat(data: bytes) -> tuple:
+    """(usage_usec, nr_throttled) from raw cpu.stat bytes
+    
+    Two find() scans over the ~200 byte buffer, no per-line split. Both
+    fields are read in the same pass (usage_usec is the first line).
+    """
+    return _cpu_stat_field(data, b"usage_usec "), _cpu_stat_field(data, b"\nnr_throttled ")
+
 @dataclass 
 class MetricPoint:
     timestamp: float
@@ -18,14 +45,66 @@ class MetricPoint:
     net_rx_bytes: int = 0
     net_tx_bytes: int = 0
 
+class MetricRing:
+    """Fixed-capacity history of metric points stored column-wise
+    
+    One typed array per field instead of a deque of MetricPoint objects, so
+    a sample is five slot writes and no per-point allocation.
+    """
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamp = array('d', [0.0]) * capacity
+        self.cpu_percent = array('d', [0.0]) * capacity
+        self.memory_bytes = array('q', [0]) * capacity
+        self.memory_percent = array('d', [0.0]) * capacity
+        self.pids = array('q', [0]) * capacity
+        self._head = 0   # next slot to write
+        self._count = 0
+    
+    def __len__(self):
+        return self._count
+    
+    def append(self, point: MetricPoint):
+        i = self._head
+        self.timestamp[i] = point.timestamp
+        self.cpu_percent[i] = point.cpu_percent
+        self.memory_bytes[i] = point.memory_bytes
+        self.memory_percent[i] = point.memory_percent
+        self.pids[i] = point.pids
+        self._head = (i + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+    
+    def _column(self, values: array, limit: Optional[int]) -> list:
+        """Last `limit` values of one column, oldest first"""
+        n = self._count if limit is None else min(limit, self._count)
+        start = self._head - n
+        if start >= 0:
+            return values[start:self._head].tolist()
+        return values[start:].tolist() + values[:self._head].tolist()
+    
+    def series(self, limit: Optional[int] = None) -> Tuple[list, list, list]:
+        """(timestamps, cpu_percent, memory_bytes) for the last `limit` points"""
+        return (self._column(self.timestamp, limit),
+                self._column(self.cpu_percent, limit),
+                self._column(self.memory_bytes, limit))
+    
+    def points(self, limit: Optional[int] = None) -> List[MetricPoint]:
+        columns = zip(*self.series(limit),
+                      self._column(self.memory_percent, limit),
+                      self._column(self.pids, limit))
+        return [MetricPoint(timestamp=t, cpu_percent=c, memory_bytes=m, memory_percent=mp, pids=p)
+                for t, c, m, mp, p in columns]
+
 class MetricsCollector:
     """Collects and stores container metrics over time"""
     
     def __init__(self, history_size: int = 60):
         self.history_size = history_size
-        self._metrics: Dict[str, deque] = {}
-        self._prev_cpu: Dict[str, int] = {}
-        self._prev_time: Dict[str, float] = {}
+        self._metrics: Dict[str, MetricRing] = {}
+        self._prev_cpu: Dict[str, Tuple[int, float]] = {}  # id -> (usage_usec, time)
+        self._paths: Dict[str, Dict[str, str]] = {}
         self._callbacks: List[Callable] = []
         self._running = False
         self._thread = None
@@ -39,74 +118,85 @@ class MetricsCollector:
         if callback in self._callbacks:
             self._callbacks.remove(callback)
     
-    def _read_cgroup_value(self, path: Path) -> int:
+    def _read_cgroup_value(self, path: str) -> int:
         try:
-            content = path.read_text().strip()
-            return -1 if content == "max" else int(content)
+            content = read_small(path).strip()
+            return -1 if content == b"max" else int(content)
         except:
             return 0
     
-    def _collect_container_metrics(self, container_id: str, cgroup_path: Path) -> MetricPoint:
+    def _paths_for(self, container_id: str) -> Dict[str, str]:
+        """Plain string paths of a container's cgroup files, built on first sight"""
+        paths = self._paths.get(container_id)
+        if paths is None:
+            base = f"{CGROUP_BASE}/{container_id}"
+            paths = self._paths[container_id] = {
+                "mem": f"{base}/memory.current",
+                "memmax": f"{base}/memory.max",
+                "cpustat": f"{base}/cpu.stat",
+                "pids": f"{base}/pids.current",
+            }
+        return paths
+    
+    def _collect_container_metrics(self, container_id: str) -> MetricPoint:
         """Collect metrics for a single container"""
         point = MetricPoint(timestamp=time.time())
+        paths = self._paths_for(container_id)
         
         # Memory
-        mem_current = cgroup_path / "memory.current"
-        mem_max = cgroup_path / "memory.max"
-        if mem_current.exists():
-            point.memory_bytes = self._read_cgroup_value(mem_current)
-            mem_limit = self._read_cgroup_value(mem_max)
+        point.memory_bytes = self._read_cgroup_value(paths["mem"])
+        if point.memory_bytes:
+            mem_limit = self._read_cgroup_value(paths["memmax"])
             if mem_limit > 0:
                 point.memory_percent = (point.memory_bytes / mem_limit) * 100
         
         # CPU
-        cpu_stat = cgroup_path / "cpu.stat"
-        if cpu_stat.exists():
-            for line in cpu_stat.read_text().splitlines():
-                if line.startswith("usage_usec"):
-                    cpu_ns = int(line.split()[1]) * 1000
-                    
-                    prev_cpu = self._prev_cpu.get(container_id, 0)
-                    prev_time = self._prev_time.get(container_id, point.timestamp)
-                    
-                    delta_cpu = cpu_ns - prev_cpu
-                    delta_time = point.timestamp - prev_time
-                    
-                    if delta_time > 0 and prev_cpu > 0:
-                        # CPU percent (100% = 1 core fully used)
-                        point.cpu_percent = (delta_cpu / (delta_time * 1e9)) * 100
-                    
-                    self._prev_cpu[container_id] = cpu_ns
-                    self._prev_time[container_id] = point.timestamp
-                    break
+        try:
+            usage_usec, _ = parse_cpu_stat(read_small(paths["cpustat"]))
+        except (OSError, ValueError):
+            usage_usec = 0
+        if usage_usec:
+            prev_usec, prev_time = self._prev_cpu.get(container_id, (0, point.timestamp))
+            delta_time = point.timestamp - prev_time
+            
+            if delta_time > 0 and prev_usec > 0:
+                # CPU percent (100% = 1 core fully used)
+                point.cpu_percent = (usage_usec - prev_usec) / (delta_time * 1e6) * 100
+            
+            self._prev_cpu[container_id] = (usage_usec, point.timestamp)
         
         # PIDs
-        pids_current = cgroup_path / "pids.current"
-        if pids_current.exists():
-            point.pids = self._read_cgroup_value(pids_current)
+        point.pids = self._read_cgroup_value(paths["pids"])
         
         return point
     
     def collect_all(self) -> Dict[str, MetricPoint]:
         """Collect metrics for all containers"""
         results = {}
-        cgroup_base = Path("/sys/fs/cgroup/kernelsight")
         
-        if not cgroup_base.exists():
+        try:
+            entries = os.scandir(CGROUP_BASE)
+        except OSError:
             return results
         
-        for container_dir in cgroup_base.iterdir():
-            if not container_dir.is_dir():
-                continue
-            container_id = container_dir.name
-            
-            point = self._collect_container_metrics(container_id, container_dir)
-            results[container_id] = point
-            
-            # Store in history
-            if container_id not in self._metrics:
-                self._metrics[container_id] = deque(maxlen=self.history_size)
-            self._metrics[container_id].append(point)
+        with entries:
+            for entry in entries:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+                container_id = entry.name
+                
+                point = self._collect_container_metrics(container_id)
+                results[container_id] = point
+                
+                # Store in history
+                if container_id not in self._metrics:
+                    self._metrics[container_id] = MetricRing(self.history_size)
+                self._metrics[container_id].append(point)
+        
+        # Forget path strings and CPU counters of removed containers
+        for container_id in [c for c in self._paths if c not in results]:
+            del self._paths[container_id]
+            self._prev_cpu.pop(container_id, None)
         
         # Notify callbacks
         for callback in self._callbacks:
@@ -119,7 +209,13 @@ class MetricsCollector:
     
     def get_history(self, container_id: str) -> List[MetricPoint]:
         """Get metric history for a container"""
-        return list(self._metrics.get(container_id, []))
+        ring = self._metrics.get(container_id)
+        return ring.points() if ring is not None else []
+    
+    def get_series(self, container_id: str, limit: Optional[int] = None) -> Tuple[list, list, list]:
+        """Get (timestamps, cpu_percent, memory_bytes) for the last `limit` points"""
+        ring = self._metrics.get(container_id)
+        return ring.series(limit) if ring is not None else ([], [], [])
     
     def _collection_loop(self, interval: float):
         """Background collection loop"""
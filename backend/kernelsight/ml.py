@@ -10,6 +10,7 @@ Implements multiple detection algorithms:
 
 import time
 import math
+import threading
 from collections import deque
 from dataclasses import dataclass, field
 from typing import Dict, List, Tuple, Optional
@@ -111,6 +112,8 @@ class EnhancedAnomalyDetector:
         self.container_stats: Dict[str, ContainerStats] = {}
         self.global_anomalies: List[dict] = []
         self.system_start_time: float = time.time()
+        # process_tick runs in a worker thread; serialize it against resets
+        self._lock = threading.RLock()
     
     def _get_stats(self, container_id: str) -> ContainerStats:
         """Get or create stats for a container"""
@@ -823,32 +826,45 @@ class EnhancedAnomalyDetector:
             "slope": round(slope, 3)
         }
     
-    def get_all_analytics(self) -> dict:
-        """Get analytics for all containers with system-wide stats"""
+    def get_all_analytics(self, precomputed: Optional[Dict[str, dict]] = None) -> dict:
+        """Get analytics for all containers with system-wide stats
+        
+        `precomputed` maps container ids to analytics the caller already
+        fetched this tick, so they are not recomputed.
+        """
+        precomputed = precomputed or {}
         container_analytics = {
-            cid: self.get_container_analytics(cid) 
+            cid: precomputed[cid] if cid in precomputed else self.get_container_analytics(cid)
             for cid in self.container_stats
         }
         
-        # Calculate system-wide aggregates
-        total_cpu = sum(a.get("cpu_current", 0) for a in container_analytics.values())
-        total_memory = sum(a.get("memory_current", 0) for a in container_analytics.values())
-        avg_health = sum(a.get("health_score", 100) for a in container_analytics.values()) / max(len(container_analytics), 1)
-        avg_stability = sum(a.get("stability_score", 100) for a in container_analytics.values()) / max(len(container_analytics), 1)
-        avg_efficiency = sum(a.get("efficiency_score", 100) for a in container_analytics.values()) / max(len(container_analytics), 1)
-        
-        stressed_count = sum(1 for a in container_analytics.values() if a.get("is_stressed", False))
-        unhealthy_count = sum(1 for a in container_analytics.values() if a.get("health_score", 100) < 70)
-        
-        # Anomaly breakdown by type
+        # Calculate system-wide aggregates in a single pass
+        total_cpu = 0.0
+        total_memory = 0
+        sum_health = sum_stability = sum_efficiency = 0.0
+        stressed_count = unhealthy_count = 0
+        for a in container_analytics.values():
+            health = a.get("health_score", 100)
+            total_cpu += a.get("cpu_current", 0)
+            total_memory += a.get("memory_current", 0)
+            sum_health += health
+            sum_stability += a.get("stability_score", 100)
+            sum_efficiency += a.get("efficiency_score", 100)
+            if a.get("is_stressed", False):
+                stressed_count += 1
+            if health < 70:
+                unhealthy_count += 1
+        count = max(len(container_analytics), 1)
+        avg_health = sum_health / count
+        avg_stability = sum_stability / count
+        avg_efficiency = sum_efficiency / count
+        
+        # Anomaly breakdown by type and severity
         anomaly_types = {}
+        severity_counts = {"high": 0, "medium": 0, "low": 0}
         for a in self.global_anomalies[-100:]:
             atype = a.get("type", "unknown")
             anomaly_types[atype] = anomaly_types.get(atype, 0) + 1
-        
-        # Anomaly breakdown by severity
-        severity_counts = {"high": 0, "medium": 0, "low": 0}
-        for a in self.global_anomalies[-100:]:
             sev = a.get("severity", "low")
             severity_counts[sev] = severity_counts.get(sev, 0) + 1
         
@@ -909,10 +925,28 @@ class EnhancedAnomalyDetector:
             "prediction_horizon_seconds": 30
         }
     
+    def process_tick(self, entries: List[tuple]) -> Tuple[Dict[str, List[dict]], Dict[str, dict], dict]:
+        """Run one broadcast tick through the detector
+        
+        `entries` holds (container_id, cpu_percent, memory_bytes, memory_limit,
+        is_throttled) per container. Returns the new anomalies and analytics
+        per container plus get_all_analytics() for the tick, so the caller
+        can do all detector work in a single call (e.g. off the event loop).
+        """
+        anomalies_by_id = {}
+        analytics_by_id = {}
+        with self._lock:
+            for container_id, cpu_percent, memory_bytes, memory_limit, is_throttled in entries:
+                anomalies_by_id[container_id] = self.add_metrics(
+                    container_id, cpu_percent, memory_bytes, memory_limit, is_throttled
+                )
+                analytics_by_id[container_id] = self.get_container_analytics(container_id)
+            return anomalies_by_id, analytics_by_id, self.get_all_analytics(analytics_by_id)
+    
     def reset_container(self, container_id: str):
         """Reset stats for a container (e.g., after restart)"""
-        if container_id in self.container_stats:
-            del self.container_stats[container_id]
+        with self._lock:
+            self.container_stats.pop(container_id, None)
     
     def get_container_history_data(self, container_id: str) -> dict:
         """Get raw history data for charts"""
@@ -8,13 +8,16 @@ import os
 import time
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, NamedTuple, Optional
 from dataclasses import dataclass
 
 # Storage directory for CSV files
 DATA_DIR = Path("/tmp/kernelsight/data")
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+# Page size for converting /proc/<pid>/statm page counts to bytes
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
 # IST timezone (UTC+5:30)
 IST = timezone(timedelta(hours=5, minutes=30))
 
@@ -53,6 +56,23 @@ class ProcessInfo:
     cmd: str
 
 
+class MetricRow(NamedTuple):
+    """One container's metrics snapshot for the history CSV"""
+    container_id: str
+    container_name: str
+    cpu_percent: float
+    memory_bytes: int
+    memory_percent: float
+    memory_limit: int
+    pids: int
+    health_score: float = 100.0
+    stability_score: float = 100.0
+    efficiency_score: float = 100.0
+    is_stressed: bool = False
+    cpu_rate: float = 0.0
+    anomaly_count: int = 0
+
+
 class MetricsStorage:
     """
     CSV-based storage for container metrics.
@@ -114,18 +134,30 @@ class MetricsStorage:
                       stability_score: float = 100.0, efficiency_score: float = 100.0,
                       is_stressed: bool = False, cpu_rate: float = 0.0, anomaly_count: int = 0):
         """Store a metrics snapshot to CSV"""
+        self.store_metrics_batch([MetricRow(
+            container_id, container_name, cpu_percent, memory_bytes, memory_percent,
+            memory_limit, pids, health_score, stability_score, efficiency_score,
+            is_stressed, cpu_rate, anomaly_count
+        )])
+    
+    def store_metrics_batch(self, rows: List[MetricRow]):
+        """Store many metrics snapshots with one open/write and one rotation check"""
+        if not rows:
+            return
         try:
             ts = time.time()
             dt = get_ist_datetime(ts)
             
             with open(self.csv_path, 'a', newline='') as f:
                 writer = csv.writer(f)
-                writer.writerow([
-                    round(ts, 2), dt, container_id, container_name,
-                    round(cpu_percent, 2), memory_bytes, round(memory_percent, 2),
-                    memory_limit, pids, round(health_score, 1), round(stability_score, 1),
-                    round(efficiency_score, 1), 1 if is_stressed else 0, round(cpu_rate, 2), anomaly_count
-                ])
+                writer.writerows([
+                    round(ts, 2), dt, r.container_id, r.container_name,
+                    round(r.cpu_percent, 2), r.memory_bytes, round(r.memory_percent, 2),
+                    r.memory_limit, r.pids, round(r.health_score, 1),
+                    round(r.stability_score, 1), round(r.efficiency_score, 1),
+                    1 if r.is_stressed else 0, round(r.cpu_rate, 2),
+                    r.anomaly_count
+                ] for r in rows)
             
             # Rotate file if too large
             self._rotate_if_needed()
@@ -134,18 +166,24 @@ class MetricsStorage:
     
     def store_anomaly(self, container_id: str, anomaly: dict):
         """Store an anomaly to the anomaly CSV"""
+        self.store_anomalies([(container_id, anomaly)])
+    
+    def store_anomalies(self, items: List[tuple]):
+        """Store many (container_id, anomaly) pairs with one open/write"""
+        if not items:
+            return
         try:
-            ts = anomaly.get('timestamp', time.time())
-            dt = get_ist_datetime(ts)
-            
+            now = time.time()
             with open(self.anomaly_csv_path, 'a', newline='') as f:
                 writer = csv.writer(f)
-                writer.writerow([
-                    round(ts, 2), dt, container_id, anomaly.get('type', 'unknown'),
-                    anomaly.get('severity', 'low'), anomaly.get('value', 0),
-                    anomaly.get('expected', 0), anomaly.get('z_score', 0),
-                    anomaly.get('algorithm', 'unknown'), anomaly.get('message', '')
-                ])
+                for container_id, anomaly in items:
+                    ts = anomaly.get('timestamp', now)
+                    writer.writerow([
+                        round(ts, 2), get_ist_datetime(ts), container_id, anomaly.get('type', 'unknown'),
+                        anomaly.get('severity', 'low'), anomaly.get('value', 0),
+                        anomaly.get('expected', 0), anomaly.get('z_score', 0),
+                        anomaly.get('algorithm', 'unknown'), anomaly.get('message', '')
+                    ])
         except Exception as e:
             print(f"Error storing anomaly: {e}")
     
@@ -418,10 +456,11 @@ class ProcessInspector:
         pids = []
         
         try:
-            if cgroup_procs.exists():
-                content = cgroup_procs.read_text().strip()
-                if content:
-                    pids = [int(p) for p in content.split('\n') if p.strip()]
+            # int() takes the raw bytes; no decode or strip needed
+            with open(cgroup_procs, 'rb') as f:
+                pids = [int(p) for p in f.read().split()]
+        except FileNotFoundError:
+            pass
         except Exception as e:
             print(f"Error reading container PIDs from {cgroup_procs}: {e}")
         
@@ -458,15 +497,11 @@ class ProcessInspector:
             except:
                 cmdline = f"[{name}]"
             
-            # Read status for memory info
+            # Resident set size: second field of statm, in pages (same as VmRSS)
             mem_bytes = 0
             try:
-                for line in (proc_path / "status").read_text().splitlines():
-                    if line.startswith("VmRSS:"):
-                        # VmRSS is in KB
-                        mem_kb = int(line.split()[1])
-                        mem_bytes = mem_kb * 1024
-                        break
+                with open(f"/proc/{pid}/statm", 'rb') as f:
+                    mem_bytes = int(f.read().split()[1]) * PAGE_SIZE
             except:
                 pass
             
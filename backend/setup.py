@@ -13,9 +13,10 @@ setup(
         "click>=8.1.0",
         "rich>=13.0.0",
         "fastapi>=0.100.0",
-        "uvicorn>=0.23.0",
+        "uvicorn[standard]>=0.23.0",
         "websockets>=11.0",
         "pydantic>=2.0.0",
+        "orjson>=3.9.0",
     ],
     entry_points={
         "console_scripts": [
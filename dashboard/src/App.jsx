@@ -19,6 +19,11 @@ if (window.location.protocol === 'https:') {
   if (!WS_URL) WS_URL = `ws://${window.location.host}/ws`
 }
 
+// Ask for compressed binary metrics frames when the browser can inflate them
+if (typeof DecompressionStream !== 'undefined') {
+  WS_URL += `${WS_URL.includes('?') ? '&' : '?'}codec=deflate`
+}
+
 // Icon Components
 const Icons = {
   Box: () => (
@@ -284,6 +289,24 @@ function formatToISTFull(timestamp) {
   return date.toLocaleString('en-IN', options)
 }
 
+// Merge a metrics_delta message into the previous full metrics message
+function applyMetricsDelta(snapshot, delta) {
+  const metrics = { ...snapshot.metrics }
+  for (const id of delta.removed || []) {
+    delete metrics[id]
+  }
+  for (const [id, fields] of Object.entries(delta.metrics || {})) {
+    metrics[id] = { ...metrics[id], ...fields }
+  }
+  return { ...snapshot, anomalies: [], ...delta.changed, type: 'metrics', metrics }
+}
+
+// Inflate a raw-deflate binary WebSocket frame back to JSON text
+function inflateMessage(buffer) {
+  const stream = new Blob([buffer]).stream().pipeThrough(new DecompressionStream('deflate-raw'))
+  return new Response(stream).text()
+}
+
 // Get current IST time as a formatted string
 function getCurrentIST() {
   const now = new Date()
@@ -1419,6 +1442,7 @@ function App() {
   const [anomalies, setAnomalies] = useState([])
   const [liveTime, setLiveTime] = useState(getCurrentIST())
   const wsRef = useRef(null)
+  const snapshotRef = useRef(null)
 
   // Update live clock every second
   useEffect(() => {
@@ -1451,19 +1475,45 @@ function App() {
   useEffect(() => {
     const connect = () => {
       const ws = new WebSocket(WS_URL)
+      ws.binaryType = 'arraybuffer'
       wsRef.current = ws
 
-      ws.onopen = () => setWsStatus('connected')
+      // Heartbeat so the server can tell a live client from a zombie one
+      let heartbeat = null
+      ws.onopen = () => {
+        setWsStatus('connected')
+        heartbeat = setInterval(() => {
+          if (ws.readyState === WebSocket.OPEN) ws.send(JSON.stringify({ type: 'ping' }))
+        }, 10000)
+      }
       ws.onclose = () => {
+        clearInterval(heartbeat)
+        snapshotRef.current = null
         setWsStatus('disconnected')
         setTimeout(connect, 3000)
       }
       ws.onerror = () => setWsStatus('error')
 
+      // Binary frames inflate asynchronously; chain every message so deltas
+      // are still applied in arrival order
+      let pending = Promise.resolve()
       ws.onmessage = (event) => {
+        const text = typeof event.data === 'string'
+          ? pending.then(() => event.data)
+          : pending.then(() => inflateMessage(event.data))
+        pending = text.then(handleMessage).catch(e => console.error('WS decode error:', e))
+      }
+
+      const handleMessage = (raw) => {
         try {
-          const data = JSON.parse(event.data)
+          let data = JSON.parse(raw)
+          if (data.type === 'metrics_delta') {
+            // Rebuild the full message from the last snapshot
+            if (!snapshotRef.current) return
+            data = applyMetricsDelta(snapshotRef.current, data)
+          }
           if (data.type === 'metrics') {
+            snapshotRef.current = data
             setContainers(data.containers || [])
             setMetrics(data.metrics || {})
 